@@ -29,7 +29,7 @@ class TestCategoryUnauthenticatedRequests(TestCase):
 
         serializer = CategorySerializer(categories, many=True)
 
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
 
     def test_category_retrieve(self):
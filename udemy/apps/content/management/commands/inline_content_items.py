@@ -0,0 +1,59 @@
+from collections import defaultdict
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from udemy.apps.content.models import Content
+
+
+class Command(BaseCommand):
+    help = (
+        'Move the items of the contents into the payload of the contents, deleting their rows, for deployments with '
+        '`CONTENT_INLINE_ITEMS`, or back into their tables with --reverse.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--reverse', action='store_true')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if options['reverse']:
+            queryset, move_batch = Content.objects.filter(object_id__isnull=True), self.store_in_tables
+        else:
+            queryset, move_batch = Content.objects.filter(object_id__isnull=False), self.store_inline
+        content_ids = list(queryset.order_by('id').values_list('id', flat=True))
+
+        for start in range(0, len(content_ids), batch_size):
+            move_batch(content_ids[start:start + batch_size])
+
+        self.stdout.write(self.style.SUCCESS(f'{len(content_ids)} content items moved.'))
+
+    @transaction.atomic
+    def store_inline(self, content_ids):
+        item_field = Content._meta.get_field('item')
+        contents = defaultdict(list)
+        for content in Content.objects.select_for_update().filter(id__in=content_ids, object_id__isnull=False):
+            contents[content.content_type_id].append(content)
+
+        for content_type_id, type_contents in contents.items():
+            Item = ContentType.objects.get_for_id(content_type_id).model_class()
+            items = Item.objects.in_bulk([content.object_id for content in type_contents])
+            for content in type_contents:
+                item = items.get(content.object_id)
+                content.payload = item_field.get_payload(item) if item is not None else {}
+                content.object_id = None
+
+            Content.objects.bulk_update(type_contents, ['payload', 'object_id'])
+            Item.objects.filter(id__in=items.keys()).delete()
+
+    @transaction.atomic
+    def store_in_tables(self, content_ids):
+        contents = list(Content.objects.select_for_update().filter(id__in=content_ids, object_id__isnull=True))
+        for content in contents:
+            Item = ContentType.objects.get_for_id(content.content_type_id).model_class()
+            content.object_id = Item.objects.create(**content.payload).id
+            content.payload = None
+
+        Content.objects.bulk_update(contents, ['payload', 'object_id'])
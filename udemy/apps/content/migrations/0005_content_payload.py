@@ -0,0 +1,22 @@
+# Generated by Django 4.1.2 on 2026-10-17 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ('content', '0004_alter_content_options'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='content',
+            name='payload',
+            field=models.JSONField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='content',
+            name='object_id',
+            field=models.PositiveIntegerField(null=True),
+        ),
+    ]
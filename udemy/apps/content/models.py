@@ -1,8 +1,7 @@
-from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from django.db import models
 
-from udemy.apps.core.models import TimeStampedBase, OrderedModel
+from udemy.apps.core.models import InlineGenericForeignKey, TimeStampedBase, OrderedModel
 from udemy.apps.course.models import Course
 from udemy.apps.lesson.models import Lesson
 
@@ -28,15 +27,17 @@ class Content(OrderedModel, TimeStampedBase):
             'image',
             'file')}
     )
-    object_id = models.PositiveIntegerField()
-    item = GenericForeignKey('content_type', 'object_id')
+    object_id = models.PositiveIntegerField(null=True)
+    payload = models.JSONField(null=True)
+    item = InlineGenericForeignKey('content_type', 'object_id', 'payload')
     order_in_respect = ('lesson',)
 
     def __str__(self):
         return self.title
 
     def delete(self, using=None, keep_parents=False):
-        self.item.delete()
+        if self.object_id is not None:
+            self.item.delete()
         return super().delete(using, keep_parents)
 
 
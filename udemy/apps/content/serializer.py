@@ -1,3 +1,5 @@
+from django.conf import settings
+
 from rest_framework import serializers
 
 from udemy.apps.content import models
@@ -32,13 +34,22 @@ class LinkSerializer(serializers.ModelSerializer):
         fields = ('url',)
 
 
+class ContentItemField(GenericRelatedField):
+    """With `CONTENT_INLINE_ITEMS` the items are stored in the payload of the content, see `InlineGenericForeignKey`."""
+
+    def create_item(self, Model, data):
+        if settings.CONTENT_INLINE_ITEMS:
+            return Model(**data)
+        return super().create_item(Model, data)
+
+
 class ContentSerializer(ModelSerializer):
-    item = GenericRelatedField({
+    item = ContentItemField({
         models.Link: LinkSerializer(),
         models.Text: TextSerializer(),
         models.File: FileSerializer(),
         models.Image: ImageSerializer()
-    })
+    }, guess_type=True)
 
     class Meta:
         model = models.Content
@@ -1,18 +1,25 @@
-from django.test import TestCase
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 
 from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.test import APIClient
 
-from tests.factories.content import ContentFactory
+from tests.factories.content import ContentFactory, LinkFactory
 from tests.factories.lesson import LessonFactory
 from tests.factories.user import UserFactory
 
-from udemy.apps.content.models import Content, Link
-from udemy.apps.content.serializer import ContentSerializer
+from udemy.apps.content.models import Content, Link, Text
+from udemy.apps.content.serializer import ContentSerializer, TextSerializer
 from udemy.apps.course.models import CourseRelation
 
 CONTENT_LIST_URL = reverse('content-list')
+LESSON_LIST_URL = reverse('lesson-list')
 
 
 def content_detail_url(pk): return reverse('content-detail', kwargs={'pk': pk})
@@ -48,6 +55,94 @@ class TestContentAuthenticatedRequests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertEqual(response.data, serializer.data)
 
+    def test_create_content_with_item_type(self):
+        lesson = LessonFactory()
+        lesson.course.instructors.add(self.user)
+
+        payload = {
+            'title': 'teste',
+            'lesson': lesson.id,
+            'course': lesson.course.id,
+            'item': {
+                'type': 'link',
+                'url': 'https://google.com'
+            }
+        }
+        with patch.object(TextSerializer, 'to_internal_value') as text_to_internal_value:
+            response = self.client.post(CONTENT_LIST_URL, payload, format='json')
+
+        content = Content.objects.get(id=response.data['id'])
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(isinstance(content.item, Link))
+        self.assertEqual(content.item.url, payload['item']['url'])
+        text_to_internal_value.assert_not_called()
+
+    def test_cant_create_content_with_invalid_item_type(self):
+        lesson = LessonFactory()
+        lesson.course.instructors.add(self.user)
+
+        payload = {
+            'title': 'teste',
+            'lesson': lesson.id,
+            'course': lesson.course.id,
+            'item': {
+                'type': 'video',
+                'url': 'https://google.com'
+            }
+        }
+        response = self.client.post(CONTENT_LIST_URL, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('type', response.data['item'])
+        self.assertFalse(Content.objects.exists())
+
+    @override_settings(CONTENT_INLINE_ITEMS=True)
+    def test_create_content_stores_item_inline(self):
+        lesson = LessonFactory()
+        lesson.course.instructors.add(self.user)
+
+        payload = {
+            'title': 'teste',
+            'lesson': lesson.id,
+            'course': lesson.course.id,
+            'item': {
+                'type': 'text',
+                'content': 'Teste'
+            }
+        }
+        response = self.client.post(CONTENT_LIST_URL, payload, format='json')
+
+        content = Content.objects.get(id=response.data['id'])
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['item'], {'content': 'Teste'})
+        self.assertEqual(content.payload, {'content': 'Teste'})
+        self.assertIsNone(content.object_id)
+        self.assertTrue(isinstance(content.item, Text))
+        self.assertFalse(Text.objects.exists())
+
+    def test_create_content_stores_item_in_its_table(self):
+        lesson = LessonFactory()
+        lesson.course.instructors.add(self.user)
+
+        payload = {
+            'title': 'teste',
+            'lesson': lesson.id,
+            'course': lesson.course.id,
+            'item': {
+                'type': 'text',
+                'content': 'Teste'
+            }
+        }
+        response = self.client.post(CONTENT_LIST_URL, payload, format='json')
+
+        content = Content.objects.get(id=response.data['id'])
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIsNone(content.payload)
+        self.assertEqual(content.item, Text.objects.get(content='Teste'))
+
     def test_content_retrieve(self):
         content = ContentFactory()
         CourseRelation.objects.create(creator=self.user, course=content.course)
@@ -106,3 +201,80 @@ class TestContentAuthenticatedRequests(TestCase):
 
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertFalse(Content.objects.filter(id=content.id).exists())
+
+    def test_delete_content_with_inline_item(self):
+        content = ContentFactory(item=Text(content='Teste'))
+
+        content.course.instructors.add(self.user)
+
+        response = self.client.delete(content_detail_url(pk=content.id))
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertFalse(Content.objects.filter(id=content.id).exists())
+
+
+class TestContentItemPrefetch(TestCase):
+    """Test the items of the contents are fetched with one query per content type."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = UserFactory()
+        self.client.force_authenticate(self.user)
+        self.lesson = LessonFactory()
+        CourseRelation.objects.create(creator=self.user, course=self.lesson.course)
+
+    def create_contents(self, batch):
+        for index in range(batch):
+            if index % 2:
+                ContentFactory(course=self.lesson.course, lesson=self.lesson, item=LinkFactory())
+            else:
+                ContentFactory(course=self.lesson.course, lesson=self.lesson)
+
+    def count_queries(self, url, params):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(context.captured_queries), response
+
+    def test_content_list_items_prefetch(self):
+        self.create_contents(2)
+        num_queries, _ = self.count_queries(CONTENT_LIST_URL, {'fields': 'id,title,item'})
+
+        self.create_contents(8)
+        more_num_queries, response = self.count_queries(CONTENT_LIST_URL, {'fields': 'id,title,item'})
+
+        self.assertEqual(num_queries, more_num_queries)
+        items = [content['item'] for content in response.data['results']]
+        self.assertEqual(items, [ContentSerializer(content).data['item'] for content in Content.objects.all()])
+
+    def test_nested_contents_items_prefetch(self):
+        params = {'fields': 'id,contents', 'fields[contents]': 'id,item'}
+        self.create_contents(2)
+        num_queries, _ = self.count_queries(LESSON_LIST_URL, params)
+
+        self.create_contents(8)
+        more_num_queries, response = self.count_queries(LESSON_LIST_URL, params)
+
+        self.assertEqual(num_queries, more_num_queries)
+        self.assertEqual(len(response.data['results'][0]['contents']), 10)
+
+
+class TestInlineContentItemsCommand(TestCase):
+    def test_items_are_moved_inline_and_back(self):
+        text_content = ContentFactory()
+        link_content = ContentFactory(item=LinkFactory())
+        text = text_content.item.content
+
+        call_command('inline_content_items', batch_size=1, stdout=StringIO())
+
+        text_content.refresh_from_db()
+        link_content.refresh_from_db()
+        self.assertEqual((text_content.object_id, text_content.payload), (None, {'content': text}))
+        self.assertEqual((link_content.object_id, link_content.payload), (None, {'url': 'https://google.com'}))
+        self.assertFalse(Text.objects.exists() or Link.objects.exists())
+
+        call_command('inline_content_items', reverse=True, stdout=StringIO())
+
+        text_content.refresh_from_db()
+        self.assertIsNone(text_content.payload)
+        self.assertEqual(text_content.item, Text.objects.get(content=text))
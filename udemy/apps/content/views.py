@@ -8,6 +8,7 @@ from udemy.apps.core.permissions import IsInstructor, IsEnrolled
 
 
 class ContentViewSet(
+    view.ReorderViewMixin,
     view.ActionPermissionMixin,
     view.RelatedObjectViewMixin,
     view.AnnotatePermissionMixin,
@@ -16,6 +17,7 @@ class ContentViewSet(
 ):
     queryset = Content.objects.all()
     serializer_class = ContentSerializer
+    ordering = 'order'
     permission_classes_by_action = {
         ('default',): [IsAuthenticated, IsInstructor],
         ('retrieve', 'list'): [IsAuthenticated, IsEnrolled]
@@ -1,7 +1,10 @@
 import inspect
 
-from collections import ChainMap, OrderedDict
+from collections import ChainMap, OrderedDict, defaultdict
 
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import F, OuterRef, Subquery
+from django.db.models.constants import LOOKUP_SEP
 from django.utils.functional import cached_property
 
 from rest_framework.serializers import ModelSerializer, ReadOnlyField
@@ -16,6 +19,27 @@ def _get_rest_field_by_annotation(annotation):
         return ReadOnlyField()
 
 
+def _get_multi_valued_path(model, lookup):
+    """
+    Return the part of the lookup that ends in the first to-many relation or None if the lookup only walks through
+    single valued relations.
+    """
+    opts = model._meta
+    path = []
+    for part in lookup.split(LOOKUP_SEP):
+        try:
+            field = opts.get_field(part)
+        except FieldDoesNotExist:
+            return None
+        path.append(part)
+        if field.many_to_many or field.one_to_many:
+            return LOOKUP_SEP.join(path)
+        if not field.is_relation:
+            return None
+        opts = field.related_model._meta
+    return None
+
+
 class AnnotationBase:
     def get_annotation_serializer_fields(self):
         annotation_fields = OrderedDict()
@@ -59,6 +83,63 @@ class AnnotationBase:
         annotations_list = [self.assemble_annotation(field) for field in fields]
         return ChainMap(*annotations_list)
 
+    def get_multi_valued_path(self, model, annotation):
+        for expression in annotation.flatten():
+            if isinstance(expression, F):
+                path = _get_multi_valued_path(model, expression.name)
+                if path:
+                    return path
+        return None
+
+    def as_subquery(self, model, annotation_name, annotation):
+        """
+        Transform the annotation in a correlated subquery that aggregates only the rows of the outer object.
+        """
+        queryset = model._default_manager.filter(pk=OuterRef('pk')).order_by()
+        return Subquery(queryset.annotate(**{annotation_name: annotation}).values(annotation_name))
+
+    def compile_annotations(self, model, annotations):
+        """
+        Compile the annotations that aggregate two or more distinct to-many relations to correlated subqueries, so each
+        aggregate joins only its own relation instead of the product of all of them.
+        """
+        paths = {
+            annotation_name: self.get_multi_valued_path(model, annotation)
+            for annotation_name, annotation in annotations.items()
+        }
+        if len(set(filter(None, paths.values()))) < 2:
+            return annotations
+
+        return {
+            name: self.as_subquery(model, name, annotation) if paths[name] else annotation
+            for name, annotation in annotations.items()
+        }
+
+    def annotate_objects(self, model, objects, annotations):
+        """
+        Evaluate the annotations only for the given objects, with one grouped query for each to-many relation, and
+        attach the values to them. The objects can also be rows of `values()` with the `pk` key.
+        """
+        families = defaultdict(dict)
+        for name, annotation in annotations.items():
+            families[self.get_multi_valued_path(model, annotation)][name] = annotation
+
+        objects_by_pk = {obj['pk'] if isinstance(obj, dict) else obj.pk: obj for obj in objects}
+        if not objects_by_pk:
+            return objects
+
+        for family in families.values():
+            queryset = model._default_manager.filter(pk__in=objects_by_pk).order_by().values('pk').annotate(**family)
+            for values in queryset:
+                obj = objects_by_pk[values.pop('pk')]
+                if isinstance(obj, dict):
+                    obj.update(values)
+                    continue
+                for name, value in values.items():
+                    setattr(obj, name, value)
+
+        return objects
+
     def intersection_fields(self, fields):
         if '@all' in fields or '*' in fields:
             return self.annotation_fields
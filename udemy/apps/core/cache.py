@@ -0,0 +1,41 @@
+import time
+
+from django.core.cache import cache
+
+
+def course_tag(course_id):
+    return f'course:{course_id}'
+
+
+def model_tag(model):
+    return f'model:{model._meta.label_lower}'
+
+
+def _tag_key(tag):
+    return f'tag:{tag}'
+
+
+def get_tag_versions(tags):
+    """
+    Return the current version of the tags. A new version starts from the current time, so entries of an evicted
+    version are never valid again.
+    """
+    keys = {_tag_key(tag): tag for tag in tags}
+    versions = cache.get_many(keys.keys())
+    for key in keys.keys() - versions.keys():
+        cache.add(key, time.time_ns(), None)
+        versions[key] = cache.get(key)
+    return {keys[key]: version for key, version in versions.items()}
+
+
+def purge_tags(*tags):
+    """Outdate the cache entries tagged with the tags."""
+    for tag in tags:
+        try:
+            cache.incr(_tag_key(tag))
+        except ValueError:
+            get_tag_versions([tag])
+
+
+def tags_are_valid(tag_versions):
+    return get_tag_versions(tag_versions.keys()) == tag_versions
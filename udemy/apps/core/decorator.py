@@ -1,14 +1,229 @@
+import asyncio
+import contextvars
+import hashlib
+import json
+import time
+
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+from functools import wraps
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.db.models.signals import post_delete, post_save
 from rest_framework import status
 from rest_framework.response import Response
 
+from udemy.apps.core.permissions import get_course_scope
+
 components_list = dict()
 
+COMPONENTS_MAX_WORKERS = 16
+COMPONENT_TIMEOUT = 10
+
+COMPONENT_CACHE_TIMEOUT = 300
+PUBLIC = 'public'
+USER = 'user'
+ENROLLMENT = 'enrollment'
+CACHE_SCOPES = (PUBLIC, USER, ENROLLMENT)
+
+_missing = object()
+
+# Shared by all the requests, so the threads and database connections of the components are bounded.
+_executor = ThreadPoolExecutor(max_workers=COMPONENTS_MAX_WORKERS, thread_name_prefix='component')
+
+
+class ComponentCache:
+    """
+    Cache of the results of a component in the default Django cache.
+
+    - timeout: seconds the results are kept.
+    - scope: `public` results are shared by every user, `user` results are kept per user and `enrollment` results are
+      kept per membership of the user in the course of the `course_kwarg` url kwarg, e.g. all the students of a course
+      share the same result, or per user on routes without the kwarg.
+    - models: models, or `app_label.ModelName` strings, whose saves and deletes invalidate every result of the
+      component.
+
+    Only one request computes a missing result, the others wait for it up to `lock_timeout` seconds.
+    """
+    lock_timeout = 10
+    lock_wait = 0.05
+
+    def __init__(self, name, timeout=COMPONENT_CACHE_TIMEOUT, scope=PUBLIC, models=(), course_kwarg='pk'):
+        if scope not in CACHE_SCOPES:
+            raise ValueError(f'Invalid cache scope for component `{name}`.')
+
+        self.name = name
+        self.timeout = timeout
+        self.scope = scope
+        self.course_kwarg = course_kwarg
+
+        for model in models:
+            for signal in (post_save, post_delete):
+                signal.connect(
+                    self.invalidate, sender=model, weak=False, dispatch_uid=f'component-cache-{name}-{model}'
+                )
+
+    @property
+    def version_key(self):
+        return f'component:{self.name}:version'
+
+    def get_version(self):
+        # A new version starts from the current time, so results of an evicted version are never read again.
+        cache.add(self.version_key, time.time_ns(), None)
+        return cache.get(self.version_key)
+
+    def invalidate(self, **kwargs):
+        try:
+            cache.incr(self.version_key)
+        except ValueError:
+            self.get_version()
+
+    def get_scope(self, request, kwargs):
+        user = getattr(request, 'user', None)
+        if self.scope == PUBLIC:
+            return PUBLIC
+        if not user or not user.is_authenticated:
+            return 'anonymous'
+        # Routes without the course kwarg, e.g. lists, have no course membership, their results are kept per user.
+        if self.scope == USER or kwargs.get(self.course_kwarg) is None:
+            return f'user:{user.pk}'
+        return get_course_scope(request, int(kwargs[self.course_kwarg]))
+
+    def get_key(self, request, args, kwargs):
+        query_params = sorted(
+            (param, value) for param, value in request.query_params.items() if param != 'components'
+        )
+        arguments = json.dumps([args, sorted(kwargs.items()), query_params], default=str)
+        digest = hashlib.md5(arguments.encode()).hexdigest()
+        return f'component:{self.name}:{self.get_version()}:{self.get_scope(request, kwargs)}:{digest}'
+
+    def get_or_compute(self, key, compute):
+        value = cache.get(key, _missing)
+        if value is not _missing:
+            return value
+
+        lock_key = f'{key}:lock'
+        if not cache.add(lock_key, True, self.lock_timeout):
+            deadline = time.monotonic() + self.lock_timeout
+            while time.monotonic() < deadline and cache.get(lock_key):
+                time.sleep(self.lock_wait)
+                value = cache.get(key, _missing)
+                if value is not _missing:
+                    return value
+
+        try:
+            value = compute()
+            cache.set(key, value, self.timeout)
+        finally:
+            cache.delete(lock_key)
+        return value
+
+    async def aget_or_compute(self, key, compute):
+        value = await cache.aget(key, _missing)
+        if value is not _missing:
+            return value
+
+        lock_key = f'{key}:lock'
+        if not await cache.aadd(lock_key, True, self.lock_timeout):
+            deadline = time.monotonic() + self.lock_timeout
+            while time.monotonic() < deadline and await cache.aget(lock_key):
+                await asyncio.sleep(self.lock_wait)
+                value = await cache.aget(key, _missing)
+                if value is not _missing:
+                    return value
+
+        try:
+            value = await compute()
+            await cache.aset(key, value, self.timeout)
+        finally:
+            await cache.adelete(lock_key)
+        return value
+
+    def __call__(self, func):
+        if asyncio.iscoroutinefunction(func):
+            @wraps(func)
+            async def inner(request, *args, **kwargs):
+                key = self.get_key(request, args, kwargs)
+                return await self.aget_or_compute(key, lambda: func(request, *args, **kwargs))
+        else:
+            @wraps(func)
+            def inner(request, *args, **kwargs):
+                key = self.get_key(request, args, kwargs)
+                return self.get_or_compute(key, lambda: func(request, *args, **kwargs))
+
+        inner.cache = self
+        return inner
+
+
+def _run_component(component, request, *args, **kwargs):
+    """Run a component in a worker thread, closing the database connections of the thread when it finishes."""
+    try:
+        return component(request, *args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def _gather_async_components(components, request, *args, **kwargs):
+    async def run(component):
+        try:
+            return await asyncio.wait_for(component(request, *args, **kwargs), component.timeout)
+        except asyncio.TimeoutError:
+            return TimeoutError()
+
+    return await asyncio.gather(*[run(component) for component in components])
+
+
+def run_components(components, request, *args, **kwargs):
+    """
+    Run the components concurrently, the sync ones in the thread pool shared by all the requests, each in a copy of the
+    current context, and the coroutine ones together in an event loop, and return their results by name. A component
+    that takes more than its timeout is answered with an error without waiting for it, and is cancelled if it has not
+    started yet.
+    """
+    results = dict()
+
+    sync_components = {name: c for name, c in components.items() if not asyncio.iscoroutinefunction(c)}
+    async_components = {name: c for name, c in components.items() if asyncio.iscoroutinefunction(c)}
+
+    futures = {
+        name: (
+            _executor.submit(contextvars.copy_context().run, _run_component, component, request, *args, **kwargs),
+            time.monotonic()
+        )
+        for name, component in sync_components.items()
+    }
+    try:
+        if async_components:
+            async_results = async_to_sync(_gather_async_components)(
+                list(async_components.values()), request, *args, **kwargs
+            )
+            results.update(zip(async_components.keys(), async_results))
+
+        for name, (future, started) in futures.items():
+            timeout = sync_components[name].timeout - (time.monotonic() - started)
+            try:
+                results[name] = future.result(timeout=max(timeout, 0))
+            except TimeoutError as exc:
+                results[name] = exc
+    finally:
+        for future, _ in futures.values():
+            future.cancel()
+
+    return {
+        name: {'details': f'Timeout for component {name}'} if isinstance(result, TimeoutError) else result
+        for name, result in results.items()
+    }
+
 
 def componentize(result_name=None):
     """
     A decorator used to componentize an endpoint to accept query params with components name registered with @component
     that are retrieved and attached to the response.
 
+    The permissions of all components are checked before running them, with the view's object fetched once, then the
+    components run concurrently, see `run_components`.
+
     Example: http://127.0.0.1:8000/api/course/?components=do_something,do_other
 
     """
@@ -26,28 +241,28 @@ def componentize(result_name=None):
 
             components = request.query_params.get('components')
             if components:
-                for component_name in components.split(','):
-                    component = components_list.get(component_name)
-                    if not component:
-                        continue
-
-                    permission_classes = component.permission_classes
-                    if permission_classes:
-                        for permission in permission_classes:
-                            if not permission.has_object_permission(self, request, func, self.get_object()):
-                                return Response(
-                                    {'details': f'Access denied for component {component_name}'},
-                                    status=status.HTTP_403_FORBIDDEN
-                                )
-                            if not permission.has_permission(self, request, func):
-                                return Response(
-                                    {'details': f'Access denied for component {component_name}'},
-                                    status=status.HTTP_403_FORBIDDEN
-                                )
-
-                    response.update({
-                        component_name: component(request, *args, **kwargs)
-                    })
+                requested_components = {
+                    component_name: components_list[component_name]
+                    for component_name in components.split(',') if component_name in components_list
+                }
+
+                obj = None
+                for component_name, component in requested_components.items():
+                    for permission in [permission() for permission in component.permission_classes or []]:
+                        if not permission.has_permission(request, self):
+                            return Response(
+                                {'details': f'Access denied for component {component_name}'},
+                                status=status.HTTP_403_FORBIDDEN
+                            )
+                        if obj is None:
+                            obj = self.get_object()
+                        if not permission.has_object_permission(request, self, obj):
+                            return Response(
+                                {'details': f'Access denied for component {component_name}'},
+                                status=status.HTTP_403_FORBIDDEN
+                            )
+
+                response.update(run_components(requested_components, request, *args, **kwargs))
             return Response(response, status=old_response.status_code)
 
         return inner
@@ -55,9 +270,15 @@ def componentize(result_name=None):
     return decorator
 
 
-def component(name=None, permission_classes=None):
+def component(name=None, permission_classes=None, timeout=COMPONENT_TIMEOUT, component_cache=None):
     """
     A decorator used to transform a function in a component.
+
+    The function can be a coroutine function, in that case it runs in an event loop with the other coroutine
+    components, `timeout` is the number of seconds the response waits for the component.
+
+    `component_cache` is a dict of `ComponentCache` options to cache the results of the component, e.g.
+    `@component(component_cache={'timeout': 600, 'scope': 'enrollment', 'models': ['course.Course']})`.
     """
 
     def decorator(func):
@@ -65,10 +286,12 @@ def component(name=None, permission_classes=None):
         if not name:
             name = func.__name__
 
+        if component_cache is not None:
+            func = ComponentCache(name, **component_cache)(func)
+
         func.permission_classes = permission_classes
+        func.timeout = timeout
 
         components_list[name] = func
 
     return decorator
-
-
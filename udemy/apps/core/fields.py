@@ -1,5 +1,6 @@
-from django.core.exceptions import ImproperlyConfigured
-from django.db.models import Manager
+from collections.abc import Mapping
+
+from django.db.models import Manager, QuerySet, prefetch_related_objects
 from django.utils.translation import gettext_lazy as _
 
 from rest_framework import serializers
@@ -9,17 +10,27 @@ class GenericRelatedField(serializers.Field):
     """
     Represents a generic relation / foreign key. It's actually more of a wrapper, that delegates the logic to registered
     serializers based on the `Model` class.
+
+    Writes select the serializer by the model name in the `type_field` key of the data, e.g.
+    `{"type": "link", "url": "https://google.com"}`. With `guess_type` the data without a type is validated by every
+    serializer and the last one that accepts it is used.
     """
     default_error_messages = {
         'no_model_match': _('Invalid model - model not available.'),
         'no_url_match': _('Invalid hyperlink - No URL match'),
         'incorrect_url_match': _(
             'Invalid hyperlink - view name not available'),
+        'invalid': _('Invalid data. Expected a dictionary, but got {datatype}.'),
+        'no_type_match': _('Invalid type - `{type}` is not available.'),
+        'no_data_match': _('Invalid data - no type accepts the data.'),
     }
 
-    def __init__(self, serializers, *args, **kwargs):
+    def __init__(self, serializers, *args, type_field='type', guess_type=False, **kwargs):
         super().__init__(*args, **kwargs)
         self.serializers = serializers
+        self.type_field = type_field
+        self.guess_type = guess_type
+        self.models_by_type = {Model._meta.model_name: Model for Model in serializers}
 
         for serializer in serializers.values():
             if serializer.source is not None:
@@ -28,15 +39,19 @@ class GenericRelatedField(serializers.Field):
             serializer.bind('', self)
 
     def to_internal_value(self, data):
-        try:
-            serializer, Model = self.get_serializer_for_data(data)
-        except ImproperlyConfigured as e:
-            raise serializers.ValidationError(e)
-        ret = serializer.to_internal_value(data)
+        if not isinstance(data, Mapping):
+            self.fail('invalid', datatype=type(data).__name__)
 
-        model_object = Model.objects.create(**ret)
+        if self.type_field not in data and self.guess_type:
+            serializer, Model, ret = self.get_serializer_for_data(data)
+        else:
+            serializer, Model = self.get_serializer_for_type(data.get(self.type_field))
+            ret = serializer.to_internal_value(data)
 
-        return model_object
+        return self.create_item(Model, ret)
+
+    def create_item(self, Model, data):
+        return Model.objects.create(**data)
 
     def to_representation(self, instance):
         serializer = self.get_serializer_for_instance(instance)
@@ -48,17 +63,26 @@ class GenericRelatedField(serializers.Field):
                 return self.serializers[klass]
         raise serializers.ValidationError(self.error_messages['no_model_match'])
 
+    def get_serializer_for_type(self, item_type):
+        Model = self.models_by_type.get(item_type) if isinstance(item_type, str) else None
+        if Model is None:
+            raise serializers.ValidationError(
+                {self.type_field: [self.error_messages['no_type_match'].format(type=item_type)]}
+            )
+        return self.serializers[Model], Model
+
     def get_serializer_for_data(self, value):
-        serializer = model = None
+        serializer = model = result = None
         for Model, model_serializer in self.serializers.items():
             try:
-                result = model_serializer.to_internal_value(value)
-                if bool(result):
-                    serializer = model_serializer
-                    model = Model
+                model_result = model_serializer.to_internal_value(value)
+                if bool(model_result):
+                    serializer, model, result = model_serializer, Model, model_result
             except Exception:
                 pass
-        return serializer, model
+        if serializer is None:
+            self.fail('no_data_match')
+        return serializer, model, result
 
 
 class AnnotationDictField(serializers.Field):
@@ -108,18 +132,43 @@ class RelatedObjectListSerializer(serializers.ListSerializer):
 
     def to_representation(self, data):
         if isinstance(data, Manager):
-            if self.filter:
-                data = data.filter(**self.filter)
             iterable = data.all()
+            # A prefetched manager returns its cached queryset that was already filtered by the prefetch.
+            if self.filter and iterable._result_cache is None:
+                iterable = iterable.filter(**self.filter)
+
+            iterable = self.get_values_iterable(iterable)
 
             if self.paginator:
-                iterable = self.paginator.paginate_queryset(iterable)
+                iterable = self.paginator.paginate_queryset(iterable, parent=data.instance)
         else:
-            iterable = data
+            iterable = self.get_values_iterable(data)
+
+        iterable = self.prefetch_generic_related_fields(iterable)
 
-        ret = [self.child.to_representation(item) for item in iterable]
+        if self.child.values_fields is not None:
+            ret = [self.child.to_values_representation(item) for item in iterable]
+        else:
+            ret = [self.child.to_representation(item) for item in iterable]
 
         if self.paginator and self.paginator.num_pages > 1:
             return self.paginator.get_paginated_data(ret)
 
         return ret
+
+    def prefetch_generic_related_fields(self, iterable):
+        """Prefetch the generic foreign keys of the child's fields that were not prefetched with the objects."""
+        lookups = self.child.get_generic_prefetch_lookups()
+        if not lookups:
+            return iterable
+        if isinstance(iterable, QuerySet):
+            return iterable.prefetch_related(*lookups) if iterable._result_cache is None else iterable
+        iterable = list(iterable)
+        prefetch_related_objects(iterable, *lookups)
+        return iterable
+
+    def get_values_iterable(self, iterable):
+        """Fetch the objects of a not evaluated queryset as `values()` rows when the child can represent them."""
+        if isinstance(iterable, QuerySet) and iterable._result_cache is None and self.child.values_fields is not None:
+            return self.child.get_values_queryset(iterable)
+        return iterable
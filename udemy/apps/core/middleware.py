@@ -1,13 +1,19 @@
-from threading import local
+import asyncio
 
-_thread_locals = local()
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.http import HttpRequest
+from django.utils.decorators import sync_and_async_middleware
+
+_current_request = ContextVar('current_request', default=None)
 
 
 def get_current_request():
     """
-    returns the HttpRequest object for this thread
+    returns the HttpRequest object of the current context
     """
-    return getattr(_thread_locals, "request", None)
+    return _current_request.get()
 
 
 def get_current_user():
@@ -18,14 +24,43 @@ def get_current_user():
         return getattr(request, "user", None)
 
 
-class ThreadLocalMiddleware(object):
+@contextmanager
+def request_context(request=None, user=None):
     """
-    Middleware to add the HttpRequest to thread local storage
+    Set the current request of the code in the block, the previous one is restored when it exits.
+
+    Background tasks and management commands that have no request can set the current user:
+
+        with request_context(user=admin):
+            Course.objects.create(title='title')
     """
+    if request is None:
+        request = HttpRequest()
+    if user is not None:
+        request.user = user
+
+    token = _current_request.set(request)
+    try:
+        yield request
+    finally:
+        _current_request.reset(token)
 
-    def __init__(self, get_response):
-        self.get_response = get_response
 
-    def __call__(self, request):
-        _thread_locals.request = request
-        return self.get_response(request)
+@sync_and_async_middleware
+def request_context_middleware(get_response):
+    """
+    Middleware that sets the HttpRequest as the current request while it is handled.
+
+    The request lives in a context variable, so it follows the request into coroutines and `sync_to_async` threads and
+    is released with the response.
+    """
+    if asyncio.iscoroutinefunction(get_response):
+        async def middleware(request):
+            with request_context(request):
+                return await get_response(request)
+    else:
+        def middleware(request):
+            with request_context(request):
+                return get_response(request)
+
+    return middleware
@@ -0,0 +1,30 @@
+# Generated by Django 4.1.2 on 2026-10-17 12:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_alter_modeltest_options_remove_modeltest_order'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ModelSparseOrdered',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('order_key', models.BigIntegerField(db_index=True, null=True)),
+                ('title', models.CharField(max_length=100)),
+                ('model_test', models.ForeignKey(
+                    on_delete=django.db.models.deletion.CASCADE, related_name='model_sparse_ordered',
+                    to='core.modeltest'
+                )),
+            ],
+            options={
+                'ordering': ('order_key',),
+                'abstract': False,
+            },
+        ),
+    ]
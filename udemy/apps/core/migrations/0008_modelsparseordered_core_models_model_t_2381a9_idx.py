@@ -0,0 +1,17 @@
+# Generated by Django 4.1.2 on 2026-10-17 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_modelsparseordered'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='modelsparseordered',
+            index=models.Index(fields=['model_test', 'order_key'], name='core_models_model_t_2381a9_idx'),
+        ),
+    ]
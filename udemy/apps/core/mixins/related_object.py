@@ -1,13 +1,16 @@
 from collections import OrderedDict
 
-from django.db.models import Prefetch
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import ManyToManyField, Prefetch
+from django.db.models.constants import LOOKUP_SEP
+from django.db.models.fields.reverse_related import ManyToManyRel, ManyToOneRel, OneToOneRel
 from django.utils.functional import cached_property
 from django.utils.module_loading import import_string
 
 from rest_framework.exceptions import PermissionDenied
 
-from udemy.apps.core.fields import RelatedObjectListSerializer
-from udemy.apps.core.paginator import RelatedObjectPaginator
+from udemy.apps.core.fields import GenericRelatedField, RelatedObjectListSerializer
+from udemy.apps.core.paginator import COUNT_ESTIMATE, COUNT_EXACT, RelatedObjectPaginator, WindowedQuerySet
 
 
 class RelatedObjectMixin:
@@ -21,11 +24,12 @@ class RelatedObjectMixin:
     def related_objects_annotations(self):
         object_annotations = {}
         for field_name, fields in self.related_objects.items():
-            annotation_class = getattr(self.get_related_object_model(field_name), 'annotation_class', None)
+            model = self.get_related_object_model(field_name)
+            annotation_class = getattr(model, 'annotation_class', None)
             if annotation_class is not None:
                 annotations = annotation_class.get_annotations(*fields)
                 if annotations:
-                    object_annotations[field_name] = annotations
+                    object_annotations[field_name] = annotation_class.compile_annotations(model, annotations)
         return object_annotations
 
     @cached_property
@@ -37,7 +41,10 @@ class RelatedObjectMixin:
         return related_objects
 
     def get_related_objects(self):
-        return getattr(self.Meta, 'related_objects', {})
+        return {
+            field_name: dict(options)
+            for field_name, options in getattr(self.Meta, 'related_objects', {}).items()
+        }
 
     def _get_related_object_option(self, related_object, option_name, default=None):
         options = self.get_related_objects().get(related_object)
@@ -60,29 +67,123 @@ class RelatedObjectMixin:
                     detail=f'You do not have permission to access the related object `{related_object_name}`'
                 )
 
+    def get_related_object_queryset(self, field_name):
+        queryset = self.get_related_object_model(field_name).objects.order_by('id')
+
+        filter_kwargs = self._get_related_object_option(field_name, 'filter')
+        if filter_kwargs:
+            queryset = queryset.filter(**filter_kwargs)
+
+        return queryset
+
+    def get_related_object_partition(self, field_name):
+        """
+        Return the column of the related model that points to the parent object when the related object is a reverse
+        foreign key, these related objects can be prefetched one page per parent.
+        """
+        try:
+            field = self.Meta.model._meta.get_field(field_name)
+        except FieldDoesNotExist:
+            return None
+        if isinstance(field, ManyToOneRel) and not isinstance(field, OneToOneRel):
+            return field.field.attname
+        return None
+
+    def get_related_object_only_fields(self, field_name):
+        """
+        Return the model fields of the related object read by its requested fields, including the foreign key used to
+        match the prefetched objects to their parents, or None when they can't be known.
+        """
+        field = self.Meta.model._meta.get_field(field_name)
+        if not isinstance(field, (ManyToOneRel, ManyToManyRel, ManyToManyField)):
+            return None
+
+        serializer = self.get_related_object_serializer(field_name)(fields=self.related_objects[field_name])
+        only_fields = serializer.get_only_fields()
+        if only_fields is not None and isinstance(field, ManyToOneRel):
+            only_fields.add(field.field.name)
+        return only_fields
+
+    def get_related_object_prefetch_queryset(self, field_name, queryset):
+        only_fields = self.get_related_object_only_fields(field_name)
+        if only_fields is not None:
+            queryset = queryset.only(*only_fields)
+
+        partition_by = self.get_related_object_partition(field_name)
+        window = self.get_related_object_paginator(field_name).get_window()
+        if partition_by is not None and window is not None:
+            queryset = WindowedQuerySet.from_queryset(queryset, partition_by, *window)
+
+        serializer = self.get_related_object_serializer(field_name)(fields=self.related_objects[field_name])
+        return serializer.optimize_generic_related_fields(queryset)
+
+    def get_generic_prefetch_lookups(self):
+        """Return the generic foreign keys read by the `GenericRelatedField`s of the requested fields."""
+        return [
+            field.source or field_name
+            for field_name, field in self.get_cached_fields().items() if isinstance(field, GenericRelatedField)
+        ]
+
+    def optimize_generic_related_fields(self, queryset):
+        """
+        Prefetch the generic foreign keys of the requested fields, the objects of each content type are fetched with
+        one query instead of one query per object.
+        """
+        lookups = self.get_generic_prefetch_lookups()
+        return queryset.prefetch_related(*lookups) if lookups else queryset
+
+    def get_related_object_paginator(self, field_name):
+        return RelatedObjectPaginator(
+            related_object_name=field_name,
+            related_object_fields=self.related_objects[field_name],
+            request=self.context.get('request'),
+            count_mode=self._get_related_object_option(field_name, 'count', COUNT_EXACT),
+            counter=self._get_related_object_option(field_name, 'counter'),
+        )
+
     def optimize_related_object_annotations(self, queryset):
         for field_name, annotations in self.related_objects_annotations.items():
-            queryset = queryset.prefetch_related(
-                Prefetch(
-                    field_name,
-                    self.get_related_object_model(field_name).objects.annotate(**annotations).order_by('id')
-                )
-            )
+            related_queryset = self.get_related_object_queryset(field_name).annotate(**annotations)
+            if self.related_object_is_prefetch(field_name):
+                related_queryset = self.get_related_object_prefetch_queryset(field_name, related_queryset)
+            queryset = queryset.prefetch_related(Prefetch(field_name, related_queryset))
         return queryset
 
     def optimize_related_objects(self, queryset):
         for field_name in set(self.related_objects.keys()) - set(self.related_objects_annotations.keys()):
             if self.related_object_is_prefetch(field_name):
-                queryset = queryset.prefetch_related(
-                    Prefetch(field_name, self.get_related_object_model(field_name).objects.order_by('id'))
+                related_queryset = self.get_related_object_prefetch_queryset(
+                    field_name, self.get_related_object_queryset(field_name)
                 )
+                queryset = queryset.prefetch_related(Prefetch(field_name, related_queryset))
             else:
                 queryset = queryset.select_related(field_name)
         return queryset
 
+    def get_related_object_counters(self):
+        """Return the lookups of the parent counters read by the estimated counts of the related objects."""
+        counters = set()
+        for field_name in self.related_objects:
+            if not self.related_object_is_prefetch(field_name):
+                continue
+            paginator = self.get_related_object_paginator(field_name)
+            if paginator.counter and paginator.get_count_mode == COUNT_ESTIMATE:
+                counters.add(LOOKUP_SEP.join(paginator.counter.split('.')))
+        return counters
+
+    def optimize_related_object_counters(self, queryset):
+        """Select the relations of the counters so the estimated counts don't query them once per parent."""
+        for counter in self.get_related_object_counters():
+            relation = counter.rpartition(LOOKUP_SEP)[0]
+            if relation:
+                queryset = queryset.select_related(relation)
+        return queryset
+
     def auto_optimize_related_object(self, queryset):
         queryset = self.optimize_related_objects(queryset)
         queryset = self.optimize_related_object_annotations(queryset)
+        queryset = self.optimize_related_object_counters(queryset)
+        queryset = self.optimize_generic_related_fields(queryset)
         return queryset
 
     def get_related_object_model(self, field_name):
@@ -105,17 +206,22 @@ class RelatedObjectMixin:
                 serializer_kwargs.update({
                     'many': True,
                     'filter': self._get_related_object_option(field_name, 'filter'),
-                    'paginator': RelatedObjectPaginator(
-                        related_object_name=field_name,
-                        related_object_fields=fields,
-                        request=self.context.get('request')
-                    )
+                    'paginator': self.get_related_object_paginator(field_name)
                 })
 
             related_objects_fields[field_name] = Serializer(**serializer_kwargs)
 
         return related_objects_fields
 
+    def get_only_fields(self):
+        only_fields = super().get_only_fields()
+        if only_fields is not None:
+            only_fields.update(
+                field_name for field_name in self.related_objects if not self.related_object_is_prefetch(field_name)
+            )
+            only_fields.update(self.get_related_object_counters())
+        return only_fields
+
     def get_fields(self):
         fields = super().get_fields()
 
@@ -1,5 +1,34 @@
+import copy
+from collections import OrderedDict
+from threading import Lock
+
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.core.exceptions import FieldDoesNotExist
+from django.utils.functional import cached_property
+
+from rest_framework import fields as rest_fields
 from rest_framework.exceptions import PermissionDenied
+from rest_framework.fields import DictField, ListField
 from rest_framework.permissions import AllowAny
+from rest_framework.relations import ManyRelatedField, PrimaryKeyRelatedField
+from rest_framework.serializers import BaseSerializer, Serializer
+
+from udemy.apps.core.fields import AnnotationDictField, AnnotationField, GenericRelatedField
+from udemy.apps.core.models import InlineGenericForeignKey
+
+SERIALIZER_FIELDS_CACHE_SIZE = 256
+
+# Fields whose representation of a database value is the value itself.
+PLAIN_VALUE_FIELDS = (
+    rest_fields.CharField, rest_fields.EmailField, rest_fields.SlugField, rest_fields.URLField,
+    rest_fields.RegexField, rest_fields.IntegerField, rest_fields.FloatField, rest_fields.BooleanField,
+    rest_fields.ReadOnlyField, PrimaryKeyRelatedField,
+)
+# Fields whose representation of a database value has to be converted, e.g. datetimes and decimals.
+CONVERTED_VALUE_FIELDS = (
+    rest_fields.DateTimeField, rest_fields.DateField, rest_fields.TimeField, rest_fields.DecimalField,
+    rest_fields.DurationField, rest_fields.UUIDField,
+)
 
 
 class CreateAndUpdateOnlyFieldsMixin:
@@ -56,6 +85,49 @@ class PermissionForFieldMixin:
         return attrs
 
 
+class SerializerFieldsCache:
+    """
+    Bounded LRU cache of the fields built by a serializer class for a set of requested fields.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.data:
+                return None
+            self.data.move_to_end(key)
+            return self.data[key]
+
+    def set(self, key, fields):
+        with self.lock:
+            self.data[key] = fields
+            self.data.move_to_end(key)
+            while len(self.data) > self.maxsize:
+                self.data.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+
+
+serializer_fields_cache = SerializerFieldsCache(SERIALIZER_FIELDS_CACHE_SIZE)
+
+
+def copy_field(field):
+    """
+    Return a copy of a cached field, ready to be bound to a new serializer. Fields that bind child fields or serializers
+    to themselves are deep copied, so the children are bound to the copy, the others are copied without building them
+    again.
+    """
+    if isinstance(field, (BaseSerializer, ManyRelatedField, ListField, DictField, GenericRelatedField)):
+        return copy.deepcopy(field)
+    return copy.copy(field)
+
+
 class DynamicModelFieldsMixin:
     """
     A mixin for ModelSerializer that takes an additional `fields` argument that controls which fields should be
@@ -67,28 +139,92 @@ class DynamicModelFieldsMixin:
     - @all - all object's fields
 
     You can modify this fields as you want.
+
+    Fields that do not read a model field with their name or source, like method fields, can describe the model fields
+    they read in `Meta.field_sources`, e.g. `field_sources = {'url': ('slug',)}`, so `get_only_fields` can tell which
+    columns have to be loaded.
+
+    Only the requested fields are built, and they are built once per serializer class and set of requested fields,
+    the next serializers of the same shape copy them from `serializer_fields_cache`.
     """
     field_types = {'@min': 'min_fields', '@default': 'default_fields'}
 
     def __init__(self, *args, **kwargs):
-        fields = kwargs.pop('fields', None)
+        self.allowed_fields = self.get_allowed_fields(kwargs.pop('fields', None))
 
         super().__init__(*args, **kwargs)
 
-        if fields is not None:
+    @cached_property
+    def fields(self):
+        fields = super().fields
+        if self.allowed_fields is not None:
+            existing = set(fields)
+            for field_name in existing - self.allowed_fields:
+                fields.pop(field_name)
+        return fields
+
+    def get_allowed_fields(self, fields):
+        if fields is None or '@all' in fields:
+            return None
+
+        allowed = set(fields)
+        for field in fields:
+            if field in self.field_types:
+                allowed.update(getattr(self.Meta, self.field_types[field], tuple()))
+        return frozenset(allowed)
+
+    def get_cached_fields(self):
+        key = (type(self), self.allowed_fields, self.instance is not None)
+
+        fields = serializer_fields_cache.get(key)
+        if fields is None:
+            fields = OrderedDict(
+                (field_name, field) for field_name, field in super().get_fields().items()
+                if self.allowed_fields is None or field_name in self.allowed_fields
+            )
+            serializer_fields_cache.set(key, fields)
 
-            if '@all' in fields:
-                return
+        return fields
+
+    def get_fields(self):
+        return OrderedDict((field_name, copy_field(field)) for field_name, field in self.get_cached_fields().items())
 
-            for field in fields:
-                if field in self.field_types:
-                    field_values = getattr(self.Meta, self.field_types[field], tuple())
-                    fields += field_values
+    def get_only_fields(self):
+        """
+        Return the names of the model fields read by the requested fields, to be used with `QuerySet.only()`, or None
+        when a field reads something that is not a model field and is not described by `Meta.field_sources`.
+        """
+        opts = self.Meta.model._meta
+        field_sources = getattr(self.Meta, 'field_sources', dict())
 
-            allowed = set(fields)
-            existing = set(self.fields)
-            for field_name in existing - allowed:
-                self.fields.pop(field_name)
+        only_fields = {opts.pk.name}
+        for field_name, field in self.get_cached_fields().items():
+            if field_name in field_sources:
+                only_fields.update(field_sources[field_name])
+                continue
+
+            if isinstance(field, (AnnotationField, AnnotationDictField)):
+                continue
+
+            source = (field.source or field_name).split('.')[0]
+            if source == '*':
+                return None
+
+            try:
+                model_field = opts.get_field(source)
+            except FieldDoesNotExist:
+                return None
+
+            if model_field.concrete and not model_field.many_to_many:
+                only_fields.add(model_field.name)
+            elif isinstance(model_field, GenericForeignKey):
+                only_fields.update((model_field.ct_field, model_field.fk_field))
+                if isinstance(model_field, InlineGenericForeignKey):
+                    only_fields.add(model_field.payload_field)
+            elif not model_field.is_relation:
+                return None
+
+        return only_fields
 
 
 class AnnotationFieldMixin:
@@ -101,3 +237,101 @@ class AnnotationFieldMixin:
 
         return fields
 
+
+def get_value_converter(field):
+    """
+    Return the function that converts a database value to the representation of the field, None when the value is
+    its own representation or NotImplemented when the field can't represent database values.
+    """
+    if type(field) in PLAIN_VALUE_FIELDS and not getattr(field, 'pk_field', None):
+        return None
+    if type(field) in CONVERTED_VALUE_FIELDS:
+        return field.to_representation
+    return NotImplemented
+
+
+def convert_value(value, converter):
+    if value is None or converter is None:
+        return value
+    return converter(value)
+
+
+class ValuesSerializerMixin:
+    """
+    A mixin for ModelSerializer that represents objects without running each field's `to_representation` when all the
+    readable fields are model columns or annotations. The objects can be model instances or rows of
+    `QuerySet.values()`, so list serializers can skip building model instances.
+    """
+
+    @cached_property
+    def values_fields(self):
+        """
+        Return a list of `(field_name, lookup, converter)`, where the lookup of annotation dict fields is a tuple of
+        `(annotation_name, converter)`, or None when a field can't be represented from the values of the object.
+        """
+        if type(self).to_representation is not Serializer.to_representation:
+            return None
+
+        opts = self.Meta.model._meta
+
+        values_fields = []
+        for field in self._readable_fields:
+            if isinstance(field, AnnotationDictField):
+                lookup = tuple(
+                    (child.annotation_name, get_value_converter(child.child)) for child in field.children
+                )
+                if any(converter is NotImplemented for _, converter in lookup):
+                    return None
+                values_fields.append((field.field_name, lookup, None))
+                continue
+
+            if isinstance(field, AnnotationField):
+                lookup, converter = field.annotation_name, get_value_converter(field.child)
+            else:
+                if len(field.source_attrs) != 1:
+                    return None
+                try:
+                    model_field = opts.get_field(field.source_attrs[0])
+                except FieldDoesNotExist:
+                    return None
+                if not model_field.concrete or model_field.many_to_many:
+                    return None
+                lookup, converter = model_field.attname, get_value_converter(field)
+
+            if converter is NotImplemented:
+                return None
+            values_fields.append((field.field_name, lookup, converter))
+
+        return values_fields
+
+    def get_values_queryset(self, queryset, *lookups):
+        """
+        Return the queryset as rows of `values()` with the primary key, the given lookups, the columns of the fields and
+        the annotations of the fields that the queryset has, the others are represented as None like in instances
+        without them.
+        """
+        annotations = queryset.query.annotations
+        columns = {field.attname for field in self.Meta.model._meta.concrete_fields}
+
+        names = ['pk', *lookups]
+        for _, lookup, _ in self.values_fields:
+            for name in [name for name, _ in lookup] if isinstance(lookup, tuple) else [lookup]:
+                if name not in names and (name in columns or name in annotations):
+                    names.append(name)
+
+        return queryset.prefetch_related(None).values(*names)
+
+    def to_values_representation(self, instance):
+        if isinstance(instance, dict):
+            get = instance.get
+        else:
+            def get(name):
+                return getattr(instance, name, None)
+
+        ret = OrderedDict()
+        for field_name, lookup, converter in self.values_fields:
+            if isinstance(lookup, tuple):
+                ret[field_name] = {name: convert_value(get(name), converter) for name, converter in lookup}
+            else:
+                ret[field_name] = convert_value(get(lookup), converter)
+        return ret
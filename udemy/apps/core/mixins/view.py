@@ -1,39 +1,446 @@
+import asyncio
+import hashlib
+import json
 import re
-
-from django.db.models import Exists, OuterRef
+import time
+
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import close_old_connections
+from django.db.models import Exists, OuterRef, Prefetch, Subquery, prefetch_related_objects
+from django.db.models.constants import LOOKUP_SEP
+from django.http import Http404
+from django.utils.cache import get_conditional_response, patch_vary_headers
 from django.utils.functional import cached_property
+from django.utils.http import http_date, quote_etag
 
-from rest_framework.permissions import AllowAny
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.generics import get_object_or_404
+from rest_framework.permissions import AllowAny, SAFE_METHODS
+from rest_framework.response import Response
 
+from udemy.apps.core.cache import course_tag, get_tag_versions, model_tag, tags_are_valid
+from udemy.apps.core.permissions import ENROLLED, INSTRUCTOR, get_course_membership, get_course_scope
 from udemy.apps.course.models import Course
 
 
+def database_sync_to_async(func):
+    """
+    Wrap a function that queries the database to be awaited.
+
+    With `ASYNC_VIEW_CONCURRENT_QUERIES` it runs in a worker thread with its own connection, so the awaited functions
+    of a request run concurrently, otherwise it runs in the thread of the request like the async ORM methods.
+    """
+    if not settings.ASYNC_VIEW_CONCURRENT_QUERIES:
+        return sync_to_async(func)
+
+    def inner(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    return sync_to_async(inner, thread_sensitive=False)
+
+
+async def gather(*aws):
+    """Like `asyncio.gather`, but cancel the other awaitables when one raises."""
+    tasks = [asyncio.ensure_future(aw) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+
+class AsyncReadViewMixin:
+    """
+    Mixin for viewsets that serves list and retrieve as coroutines, so under ASGI a request doesn't hold a thread while
+    it waits for the database. The other actions run in a thread like any sync view.
+
+    The queryset, pagination and serializers of the other mixins are reused. The permission check runs concurrently
+    with the action, the object is fetched with the async ORM and each prefetched relation is fetched concurrently.
+
+    Must come before the viewset class in the bases.
+    """
+    async_actions = ('list', 'retrieve')
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        sync_view = sync_to_async(view)
+
+        async def async_view(request, *args, **kwargs):
+            method = 'get' if request.method.lower() == 'head' else request.method.lower()
+            if view.actions.get(method) in cls.async_actions:
+                return await view(request, *args, **kwargs)
+            return await sync_view(request, *args, **kwargs)
+
+        async_view.cls = view.cls
+        async_view.initkwargs = view.initkwargs
+        async_view.actions = view.actions
+        async_view.csrf_exempt = True
+        return async_view
+
+    def dispatch(self, request, *args, **kwargs):
+        if self.action_map.get(request.method.lower()) in self.async_actions:
+            return self.adispatch(request, *args, **kwargs)
+        return super().dispatch(request, *args, **kwargs)
+
+    async def adispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            self.format_kwarg = self.get_format_suffix(**kwargs)
+            request.accepted_renderer, request.accepted_media_type = self.perform_content_negotiation(request)
+            request.version, request.versioning_scheme = self.determine_version(request, *args, **kwargs)
+            await database_sync_to_async(self.perform_authentication)(request)
+
+            handler = getattr(self, f'a{self.action}')
+            _, response = await gather(
+                database_sync_to_async(self.check_request_permissions)(request),
+                handler(request, *args, **kwargs)
+            )
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    def check_request_permissions(self, request):
+        self.check_permissions(request)
+        self.check_throttles(request)
+
+    def get_async_queryset(self):
+        """Return the queryset without its prefetches, which are fetched concurrently, and the prefetch lookups."""
+        queryset = self.filter_queryset(self.get_queryset())
+        return queryset.prefetch_related(None), queryset._prefetch_related_lookups
+
+    async def aprefetch_related_objects(self, objs, lookups):
+        """Fetch the prefetch lookups of the objects, each relation concurrently with the others."""
+        if not objs or not lookups or isinstance(objs[0], dict):
+            return
+
+        related_lookups = defaultdict(list)
+        for lookup in lookups:
+            prefetch_to = lookup.prefetch_to if isinstance(lookup, Prefetch) else lookup
+            related_lookups[prefetch_to.split(LOOKUP_SEP)[0]].append(lookup)
+
+        # The cache is shared by the relations, it must exist before they are fetched.
+        for obj in objs:
+            obj.__dict__.setdefault('_prefetched_objects_cache', {})
+
+        await gather(*[
+            database_sync_to_async(prefetch_related_objects)(objs, *lookups)
+            for lookups in related_lookups.values()
+        ])
+
+    async def aget_object(self):
+        queryset, lookups = await database_sync_to_async(self.get_async_queryset)()
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            obj = await queryset.aget(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (queryset.model.DoesNotExist, ValidationError, TypeError, ValueError):
+            raise Http404
+
+        await gather(
+            database_sync_to_async(self.check_object_permissions)(self.request, obj),
+            self.aprefetch_related_objects([obj], lookups)
+        )
+        return obj
+
+    async def aserialize(self, *args, **kwargs):
+        return await database_sync_to_async(lambda: self.get_serializer(*args, **kwargs).data)()
+
+    async def alist(self, request, *args, **kwargs):
+        queryset, lookups = await database_sync_to_async(self.get_async_queryset)()
+
+        page = await database_sync_to_async(self.paginate_queryset)(queryset)
+        objs = page if page is not None else [obj async for obj in queryset.aiterator()]
+        await self.aprefetch_related_objects(objs, lookups)
+
+        data = await self.aserialize(objs, many=True)
+
+        if page is not None:
+            return self.get_paginated_response(data)
+        return Response(data)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        return Response(await self.aserialize(instance))
+
+
+class ConditionalViewMixin:
+    """
+    Mixin that answers retrieve requests with `304 Not Modified` while the ETag of the client is valid, checked with a
+    cheap query before the queryset is built.
+
+    The validators are the ones of the course of the object, see `Course.get_validators`, and the ETag also varies by
+    the query params and the permission scope of the user in the course. `If-Modified-Since` alone is not answered with
+    304, since the Last-Modified doesn't vary by the permission scope.
+
+    Must come before `AsyncReadViewMixin` in the bases.
+    """
+
+    def get_validators(self):
+        model = self.get_serializer_class().Meta.model
+        lookup = {self.lookup_field: self.kwargs[self.lookup_url_kwarg or self.lookup_field]}
+
+        if model == Course:
+            return Course.get_validators(**lookup)
+        return Course.get_validators(id=Subquery(model.objects.filter(**lookup).values('course_id')[:1]))
+
+    def get_etag(self, validators):
+        key = json.dumps([
+            validators['version'],
+            validators['last_modified'].isoformat(),
+            get_course_scope(self.request, validators['id']),
+            self.kwargs,
+            sorted(self.request.query_params.lists()),
+            self.request.headers.get('Accept'),
+        ], default=str)
+        return quote_etag(hashlib.md5(key.encode()).hexdigest())
+
+    def get_conditional_validators(self):
+        validators = self.get_validators()
+        if validators is None:
+            return None
+        return self.get_etag(validators), validators['last_modified']
+
+    def get_not_modified_response(self, validators):
+        if validators is not None:
+            return get_conditional_response(self.request, etag=validators[0])
+
+    def set_validators_headers(self, response, validators):
+        if validators is not None and response.status_code in (200, 304):
+            etag, last_modified = validators
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+            patch_vary_headers(response, ('Authorization',))
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        validators = self.get_conditional_validators()
+        response = self.get_not_modified_response(validators) or super().retrieve(request, *args, **kwargs)
+        return self.set_validators_headers(response, validators)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        validators = await database_sync_to_async(self.get_conditional_validators)()
+        response = self.get_not_modified_response(validators) or await super().aretrieve(request, *args, **kwargs)
+        return self.set_validators_headers(response, validators)
+
+
+class ResponseCacheViewMixin:
+    """
+    Mixin that caches the data of list and retrieve responses in the default cache.
+
+    The key is made of the view, its url kwargs, the query params, e.g. the `fields` specs and the page cursor, and the
+    permission scope of the user. Retrieves are shared by the users with the same scope in the course of the object,
+    lists are kept per user since their objects belong to different courses.
+
+    Entries are tagged with the courses they depend on, and lists also with the model of the view. They are outdated
+    by writes on the course and on the models with a `course` foreign key, see the course signals. Expired entries
+    are served for `response_cache_stale_timeout` more seconds while one request revalidates them.
+
+    Lists are cached only when paginated, the courses of their entries are the ones of the page. Retrieves that
+    request one of the `response_cache_user_related_objects`, the related objects filtered by the user, e.g. its
+    notes, are kept per user as well.
+    """
+    response_cache_timeout = settings.RESPONSE_CACHE_TIMEOUT
+    response_cache_stale_timeout = settings.RESPONSE_CACHE_STALE_TIMEOUT
+    response_cache_actions = ('list', 'retrieve')
+    response_cache_user_related_objects = ()
+
+    @property
+    def response_cache_model(self):
+        return self.get_serializer_class().Meta.model
+
+    def get_extra_columns(self):
+        columns = super().get_extra_columns()
+        if self.response_cache_model != Course:
+            columns = [*columns, 'course_id']
+        return columns
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if page is not None:
+            ref_name = 'pk' if self.response_cache_model == Course else 'course_id'
+            self.response_cache_course_ids = {
+                obj[ref_name] if isinstance(obj, dict) else getattr(obj, ref_name) for obj in page
+            }
+        return page
+
+    def get_object_course_id(self):
+        lookup = {self.lookup_field: self.kwargs[self.lookup_url_kwarg or self.lookup_field]}
+        ref_name = 'id' if self.response_cache_model == Course else 'course_id'
+        return self.response_cache_model.objects.filter(**lookup).values_list(ref_name, flat=True).first()
+
+    def get_user_scope(self):
+        user = self.request.user
+        return f'user:{user.pk}' if user and user.is_authenticated else 'anonymous'
+
+    def requests_user_related_objects(self):
+        related_objects = getattr(self, 'related_objects', {})
+        return any(field_name in related_objects for field_name in self.response_cache_user_related_objects)
+
+    def get_response_cache_entry(self):
+        """Return the key of the response and the versions of the tags known before the response is computed."""
+        model_tags = []
+        if self.action == 'retrieve':
+            course_id = self.get_object_course_id()
+            if course_id is None:
+                return None, None
+            scope = get_course_scope(self.request, course_id)
+            if self.requests_user_related_objects():
+                scope = f'{scope}:{self.get_user_scope()}'
+            model_tags.append(course_tag(course_id))
+        else:
+            scope = self.get_user_scope()
+            model_tags.append(model_tag(self.response_cache_model))
+
+        key = json.dumps([
+            f'{self.__class__.__module__}.{self.__class__.__name__}',
+            self.action,
+            self.kwargs,
+            sorted(
+                (param, ','.join(sorted(value.split(','))) if param.startswith('fields') else value)
+                for param, value in self.request.query_params.items()
+            ),
+            self.request.headers.get('Accept'),
+            scope,
+        ], default=str)
+        return f'response:{hashlib.md5(key.encode()).hexdigest()}', get_tag_versions(model_tags)
+
+    def get_cached_response(self, key):
+        """
+        Return the cached response, or None when it must be computed. An expired response is returned while another
+        request revalidates it.
+        """
+        entry = cache.get(key)
+        if entry is None or not tags_are_valid(entry['tags']):
+            return None
+        if entry['expires'] > time.time() or not cache.add(f'{key}:revalidate', True, self.response_cache_timeout):
+            return Response(entry['data'])
+        return None
+
+    def set_cached_response(self, key, tag_versions, response):
+        if response.status_code != 200 or not isinstance(response, Response):
+            return
+        if self.action == 'list':
+            course_ids = getattr(self, 'response_cache_course_ids', None)
+            if course_ids is None:
+                return
+            tag_versions = {**tag_versions, **get_tag_versions([course_tag(course_id) for course_id in course_ids])}
+
+        cache.set(key, {
+            'data': response.data,
+            'tags': tag_versions,
+            'expires': time.time() + self.response_cache_timeout,
+        }, self.response_cache_timeout + self.response_cache_stale_timeout)
+        cache.delete(f'{key}:revalidate')
+
+    def get_response_from_cache(self):
+        if self.action not in self.response_cache_actions:
+            return None, None, None
+        key, tag_versions = self.get_response_cache_entry()
+        return key, tag_versions, key and self.get_cached_response(key)
+
+    def list(self, request, *args, **kwargs):
+        key, tag_versions, response = self.get_response_from_cache()
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+            if key:
+                self.set_cached_response(key, tag_versions, response)
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        key, tag_versions, response = self.get_response_from_cache()
+        if response is None:
+            response = super().retrieve(request, *args, **kwargs)
+            if key:
+                self.set_cached_response(key, tag_versions, response)
+        return response
+
+    async def alist(self, request, *args, **kwargs):
+        key, tag_versions, response = await database_sync_to_async(self.get_response_from_cache)()
+        if response is None:
+            response = await super().alist(request, *args, **kwargs)
+            if key:
+                await database_sync_to_async(self.set_cached_response)(key, tag_versions, response)
+        return response
+
+    async def aretrieve(self, request, *args, **kwargs):
+        key, tag_versions, response = await database_sync_to_async(self.get_response_from_cache)()
+        if response is None:
+            response = await super().aretrieve(request, *args, **kwargs)
+            if key:
+                await database_sync_to_async(self.set_cached_response)(key, tag_versions, response)
+        return response
+
+
 class AnnotationViewMixin:
     """
+    Mixin that annotates the queryset with the model's annotations requested by the `fields` query param.
+
+    When the list is paginated the annotations are evaluated only for the objects of the page, after the page was
+    chosen, instead of grouping the whole table before LIMIT/OFFSET.
     """
 
-    def get_queryset(self):
-        queryset = super().get_queryset()
+    @property
+    def annotate_after_pagination(self):
+        return self.action == 'list' and self.paginator is not None
+
+    def get_annotation_class(self):
+        return getattr(self.get_serializer_class().Meta.model, 'annotation_class', None)
 
+    def get_annotations(self):
         serializer = self.get_serializer_class()
-        model = serializer.Meta.model
+        annotation_class = self.get_annotation_class()
 
-        annotation_class = getattr(model, 'annotation_class', None)
-        if annotation_class:
-            annotations = None
+        annotations = None
 
-            fields = self.request.query_params.get('fields')
-            if fields:
-                fields = serializer(fields=fields.split(',')).fields.keys()
-                annotations = annotation_class.get_annotations(*fields)
+        fields = self.request.query_params.get('fields')
+        if fields:
+            fields = serializer(fields=fields.split(',')).fields.keys()
+            annotations = annotation_class.get_annotations(*fields)
+
+        if annotations is None:
+            annotations = annotation_class.get_annotations('*')
 
-            if annotations is None:
-                annotations = annotation_class.get_annotations('*')
+        return annotations
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
 
+        annotation_class = self.get_annotation_class()
+        if annotation_class and not self.annotate_after_pagination:
+            model = self.get_serializer_class().Meta.model
+            annotations = annotation_class.compile_annotations(model, self.get_annotations())
             queryset = queryset.annotate(**annotations)
 
         return queryset
 
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+
+        annotation_class = self.get_annotation_class()
+        if page is not None and annotation_class and self.annotate_after_pagination:
+            model = self.get_serializer_class().Meta.model
+            annotation_class.annotate_objects(model, page, self.get_annotations())
+
+        return page
+
 
 class DynamicFieldViewMixin:
     """
@@ -41,6 +448,9 @@ class DynamicFieldViewMixin:
 
     Example:
         https://example.com/resource/?fields=name,@default
+
+    On read requests only the columns of the requested fields are selected, and lists whose fields are all columns or
+    annotations are fetched as `values()` rows.
     """
 
     def get_serializer(self, *args, **kwargs):
@@ -49,6 +459,54 @@ class DynamicFieldViewMixin:
             kwargs['fields'] = fields.split(',')
         return super().get_serializer(*args, **kwargs)
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+
+        fields = self.request.query_params.get('fields')
+        if fields is not None and self.request.method in SAFE_METHODS:
+            only_fields = self.get_only_fields(fields.split(','))
+            if only_fields is not None:
+                queryset = queryset.only(*only_fields)
+
+        return queryset
+
+    def get_only_fields(self, fields):
+        serializer = self.get_serializer_class()(fields=fields, context={
+            'request': self.request,
+            'view': self,
+            'related_objects': getattr(self, 'related_objects', {}),
+        })
+        only_fields = serializer.get_only_fields()
+        if only_fields is not None:
+            only_fields.update(self.get_extra_columns())
+        return only_fields
+
+    def get_ordering_fields(self):
+        """Return the attnames of the fields of the view's `ordering`, which the paginator reads from the objects."""
+        ordering = getattr(self, 'ordering', None)
+        if ordering is None:
+            return []
+
+        opts = self.get_serializer_class().Meta.model._meta
+        ordering_fields = []
+        for field_name in [ordering] if isinstance(ordering, str) else ordering:
+            try:
+                ordering_fields.append(opts.get_field(field_name.lstrip('-')).attname)
+            except FieldDoesNotExist:
+                pass
+        return ordering_fields
+
+    def get_extra_columns(self):
+        """Return the columns that the objects or rows need besides the fields, the ordering fields by default."""
+        return self.get_ordering_fields()
+
+    def paginate_queryset(self, queryset):
+        if self.action == 'list':
+            serializer = self.get_serializer()
+            if serializer.values_fields is not None:
+                queryset = serializer.get_values_queryset(queryset, *self.get_extra_columns())
+        return super().paginate_queryset(queryset)
+
 
 class RelatedObjectViewMixin:
     """
@@ -81,10 +539,42 @@ class RelatedObjectViewMixin:
         return context
 
     def get_auto_optimized_queryset(self, queryset):
-        serializer = self.get_serializer_class()(context={'related_objects': self.related_objects})
+        fields = self.request.query_params.get('fields')
+        serializer = self.get_serializer_class()(fields=fields.split(',') if fields is not None else None, context={
+            'request': self.request,
+            'view': self,
+            'related_objects': self.related_objects,
+        })
         queryset = serializer.auto_optimize_related_object(queryset)
         return queryset
 
+
+class ReorderSerializer(serializers.Serializer):
+    order = serializers.ListField(child=serializers.IntegerField(), allow_empty=False)
+
+
+class ReorderViewMixin:
+    """
+    Add a `reorder` action to a view of an ordered model, it takes the ids of all the objects in respect of an object
+    in their new order and applies it in one transaction, see `OrderedModel.reorder`.
+
+    Example: POST http://127.0.0.1:8000/api/lesson/reorder/ {"order": [3, 1, 2]}
+    """
+
+    @action(detail=False, methods=['post'])
+    def reorder(self, request, *args, **kwargs):
+        serializer = ReorderSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        pks = serializer.validated_data['order']
+
+        # All the objects are in respect of the same course, so the permissions of the first one are checked.
+        obj = get_object_or_404(self.get_queryset(), pk=pks[0])
+        self.check_object_permissions(request, obj)
+
+        self.get_queryset().model.reorder(pks)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
 class ActionPermissionMixin:
     permission_classes_by_action = {
         ('default',): [AllowAny],
@@ -107,6 +597,13 @@ class AnnotatePermissionMixin:
         if self.request.user.is_authenticated:
             ref_name = 'id' if self.get_serializer_class().Meta.model == Course else 'course__id'
 
+            membership = get_course_membership(self.request)
+            if membership.from_claim:
+                return queryset.annotate(
+                    is_enrolled=membership.get_expression(ENROLLED, ref_name),
+                    is_instructor=membership.get_expression(INSTRUCTOR, ref_name),
+                )
+
             queryset = queryset.annotate(is_enrolled=Exists(
                 self.request.user.enrolled_courses.filter(id=OuterRef(ref_name))
             )).annotate(is_instructor=Exists(
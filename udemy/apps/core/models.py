@@ -1,11 +1,15 @@
+from collections import defaultdict
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.fields import GenericForeignKey
 from django.core.exceptions import ValidationError
-from django.db import models
-from django.db.models import Max, F, ExpressionWrapper, PositiveIntegerField, Value, Count
+from django.db import connections, models, router, transaction
+from django.db.models import Max, F, ExpressionWrapper, PositiveIntegerField, Value, Count, OuterRef, Subquery, Q
 from django.utils.translation import gettext_lazy as _
 
 from udemy.apps.core.annotations import AnnotationBase
+from udemy.apps.core.signals import post_bulk_create, post_reorder
 
 
 class TimeStampedBase(models.Model):
@@ -46,9 +50,100 @@ class CreatorBase(models.Model):
     save.alters_data = True
 
 
+class InlineGenericForeignKey(GenericForeignKey):
+    """
+    Generic foreign key that stores unsaved objects inline, the values of their fields in the JSON `payload_field` of
+    the model and their type in the content type field, instead of saving them in their own table.
+
+    Saved objects are referenced like with `GenericForeignKey`. Inline objects are read as unsaved objects built from
+    the payload, so they need no query.
+    """
+
+    def __init__(self, ct_field='content_type', fk_field='object_id', payload_field='payload', **kwargs):
+        super().__init__(ct_field, fk_field, **kwargs)
+        self.payload_field = payload_field
+
+    def get_payload(self, obj):
+        return {
+            field.attname: field.get_prep_value(field.pre_save(obj, True))
+            for field in obj._meta.concrete_fields if not field.primary_key
+        }
+
+    def __get__(self, instance, cls=None):
+        if instance is None:
+            return self
+
+        payload = getattr(instance, self.payload_field)
+        if payload is None:
+            return super().__get__(instance, cls)
+
+        # Inline objects are not cached, `Model.save` refuses to save objects with unsaved cached relations.
+        ct_id = getattr(instance, self.model._meta.get_field(self.ct_field).attname)
+        return self.get_content_type(id=ct_id, using=instance._state.db).model_class()(**payload)
+
+    def __set__(self, instance, value):
+        if value is None or value.pk is not None:
+            setattr(instance, self.payload_field, None)
+            return super().__set__(instance, value)
+
+        setattr(instance, self.ct_field, self.get_content_type(obj=value))
+        setattr(instance, self.fk_field, None)
+        setattr(instance, self.payload_field, self.get_payload(value))
+        if self.is_cached(instance):
+            self.delete_cached_value(instance)
+
+
+class OrderedManager(models.Manager):
+
+    def bulk_create_ordered(self, objs, batch_size=500):
+        """
+        Create the objects with `bulk_create`, in chunks of `batch_size`, after the last object in respect of each one.
+
+        The objects are grouped by the values of their `order_in_respect` fields, the last order of all the groups is
+        fetched in one query, then the create hooks run with `do_after_bulk_create` and `post_bulk_create` is sent.
+        """
+        objs = list(objs)
+        if not objs:
+            return objs
+
+        attnames = [self.model._meta.get_field(field).attname for field in self.model.order_in_respect]
+        groups = defaultdict(list)
+        for obj in objs:
+            groups[tuple(getattr(obj, attname) for attname in attnames)].append(obj)
+
+        with transaction.atomic(using=self.db):
+            last_orders = self.get_last_orders(attnames, groups.keys())
+            for group, group_objs in groups.items():
+                self.set_orders(group_objs, *last_orders.get(group, (0, 0)))
+
+            self.model.do_after_bulk_create(objs)
+            self.bulk_create(objs, batch_size=batch_size)
+
+        post_bulk_create.send(sender=self.model, objs=objs)
+        return objs
+
+    def get_last_orders(self, attnames, groups):
+        """Return the number of objects and the last value of `order_field` of the groups of objects in respect."""
+        filters = Q()
+        for group in groups:
+            filters |= Q(**dict(zip(attnames, group)))
+
+        rows = self.model._base_manager.filter(filters).order_by().values(*attnames).annotate(
+            count=Count('pk'), last=Max(self.model.order_field)
+        )
+        return {tuple(row[attname] for attname in attnames): (row['count'], row['last'] or 0) for row in rows}
+
+    def set_orders(self, objs, count, last):
+        for index, obj in enumerate(objs, start=1):
+            obj.order = last + index
+
+
 class OrderedModel(models.Model):
     order_in_respect = None
     order = models.PositiveIntegerField(null=True)
+    order_field = 'order'
+
+    objects = OrderedManager()
 
     class Meta:
         abstract = True
@@ -71,6 +166,11 @@ class OrderedModel(models.Model):
     def do_after_create(self):
         pass
 
+    @classmethod
+    def do_after_bulk_create(cls, objs):
+        for obj in objs:
+            obj.do_after_create()
+
     def save(self, force_insert=False, **kwargs):
         if force_insert:
             self.order = self.get_next_order()
@@ -93,12 +193,189 @@ class OrderedModel(models.Model):
             self.do_after_update()
         super().save(force_insert, **kwargs)
 
+    @classmethod
+    def get_reorder_value(cls, position):
+        return position
+
+    @classmethod
+    def reorder(cls, pks):
+        """
+        Set the order of the objects in respect of the object of the first pk to the order of the pks, which must be
+        all of them.
+
+        The objects in respect are locked and updated in one `UPDATE ... FROM (VALUES ...)`, then `do_after_update`
+        runs once, for the first object, and `post_reorder` is sent.
+        """
+        with transaction.atomic(using=router.db_for_write(cls)):
+            first = cls._base_manager.filter(pk=pks[0]).first() if pks else None
+            if first is None:
+                raise ValidationError({'order': 'The first object does not exist.'})
+
+            scope_pks = first.get_queryset().select_for_update().order_by().values_list('pk', flat=True)
+            if len(set(pks)) != len(pks) or set(pks) != set(scope_pks):
+                raise ValidationError({'order': 'The order must have all the objects in respect once.'})
+
+            cls.validate_reorder(pks)
+            cls.update_order_values({pk: cls.get_reorder_value(position) for position, pk in enumerate(pks, start=1)})
+            first.do_after_update()
+
+        post_reorder.send(sender=cls, instance=first, pks=pks)
+
+    @classmethod
+    def validate_reorder(cls, pks):
+        """Hook to reject a new order of the objects in respect, raising `ValidationError`."""
+
+    @classmethod
+    def update_order_values(cls, values):
+        """Set the `order_field` of the objects to the values by pk in a single UPDATE."""
+        connection = connections[router.db_for_write(cls)]
+        quote_name = connection.ops.quote_name
+        table = quote_name(cls._meta.db_table)
+        column = quote_name(cls._meta.get_field(cls.order_field).column)
+        pk_column = quote_name(cls._meta.pk.column)
+        rows = ', '.join(['(%s, %s)'] * len(values))
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {table} SET {column} = v.value FROM (VALUES {rows}) AS v(pk, value) '
+                f'WHERE {table}.{pk_column} = v.pk',
+                [param for item in values.items() for param in item]
+            )
+
     def delete(self, using=None, keep_parents=False):
         self.get_queryset().filter(order__gt=self.order).update(
             order=ExpressionWrapper(F('order') - 1, output_field=models.PositiveIntegerField()))
         return super().delete(using, keep_parents)
 
 
+class SparseOrderedManager(OrderedManager):
+    """
+    Manager that annotates the dense `order` of the objects, their position among the objects in respect.
+
+    The position is a count of the objects before, so the models must index `(*order_in_respect, order_key)` for the
+    counts to be index range scans. A window would number only the objects left by the filters of the queryset.
+    """
+
+    def get_queryset(self):
+        fields = self.model.order_in_respect
+        positions = self.model._base_manager.filter(
+            order_key__lte=OuterRef('order_key'), **{field: OuterRef(field) for field in fields}
+        ).order_by().values(*fields).annotate(position=Count('pk')).values('position')
+        return super().get_queryset().annotate(order=Subquery(positions))
+
+    def set_orders(self, objs, count, last):
+        for index, obj in enumerate(objs, start=1):
+            obj.order_key, obj.order = last + index * self.model.order_key_gap, count + index
+
+
+class SparseOrderedModel(OrderedModel):
+    """
+    Ordered model that keeps the position of the objects in a sparse `order_key`, so inserts, moves and deletes write
+    only the row of the object.
+
+    `order` is the dense position that clients see, annotated by the manager. Setting it and saving moves the object
+    to a key between its new neighbours, and the keys of the objects in respect are rebalanced in batches when there
+    is no gap left between them.
+    """
+    order = None
+    order_key = models.BigIntegerField(null=True, db_index=True)
+    order_key_gap = 2 ** 16
+    rebalance_batch_size = 500
+    order_field = 'order_key'
+
+    objects = SparseOrderedManager()
+
+    class Meta:
+        abstract = True
+        ordering = ('order_key',)
+
+    @classmethod
+    def get_reorder_value(cls, position):
+        return position * cls.order_key_gap
+
+    def get_last_order(self):
+        return self.get_queryset().count()
+
+    def get_position(self):
+        return self.get_queryset().filter(order_key__lte=self.order_key).count()
+
+    def get_order_key_between(self, before, after):
+        """Return a key between the keys, None is the start or the end, or None when there is no gap left."""
+        if before is None and after is None:
+            return self.order_key_gap
+        if before is None:
+            return after - self.order_key_gap
+        if after is None:
+            return before + self.order_key_gap
+        key = (before + after) // 2
+        return key if before < key < after else None
+
+    def get_insert_order_key(self):
+        last_key = self.get_queryset().aggregate(key=Max('order_key'))['key']
+        return self.get_order_key_between(last_key, None)
+
+    def get_move_order_key(self, order):
+        """Return the key of the object at the position, its own key when it is already there."""
+        others = self.get_queryset().exclude(pk=self.pk).order_by('order_key', 'pk').values_list('order_key', flat=True)
+        if order <= 1:
+            before, after = None, others.first()
+        else:
+            neighbours = list(others[order - 2:order])
+            if not neighbours:
+                raise ValidationError('The order can not be greater than last order of the object.')
+            before, after = neighbours[0], neighbours[1] if len(neighbours) > 1 else None
+
+        if (before is None or before < self.order_key) and (after is None or self.order_key < after):
+            return self.order_key
+        return self.get_order_key_between(before, after)
+
+    def rebalance_order_keys(self):
+        """Spread the keys of the objects in respect by `order_key_gap`, keeping their order."""
+        objs = list(self.get_queryset().order_by('order_key', 'pk').only('pk', 'order_key'))
+        for position, obj in enumerate(objs, start=1):
+            obj.order_key = position * self.order_key_gap
+        self.__class__._base_manager.bulk_update(objs, ['order_key'], batch_size=self.rebalance_batch_size)
+
+        self.order_key = next((obj.order_key for obj in objs if obj.pk == self.pk), self.order_key)
+
+    def save(self, force_insert=False, **kwargs):
+        order = getattr(self, 'order', None)
+        adding = force_insert or self._state.adding
+
+        if adding:
+            self.order_key = self.get_insert_order_key()
+            if self.order_key is None:
+                self.rebalance_order_keys()
+                self.order_key = self.get_insert_order_key()
+            self.do_after_create()
+        elif order is not None:
+            order_key = self.get_move_order_key(order)
+            if order_key is None:
+                self.rebalance_order_keys()
+                order_key = self.get_move_order_key(order)
+            self.order_key = order_key
+            self.do_after_update()
+
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'order_key'} - {'order'}
+        models.Model.save(self, force_insert=force_insert, **kwargs)
+
+        if adding:
+            self.order = self.get_position()
+
+    def delete(self, using=None, keep_parents=False):
+        return models.Model.delete(self, using, keep_parents)
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        refresh_order = fields is None or 'order' in fields
+        if fields is not None:
+            fields = [field for field in fields if field != 'order']
+        if fields is None or fields:
+            super().refresh_from_db(using, fields, **kwargs)
+        if refresh_order:
+            self.order = self.get_position()
+
+
 class ModelTestAnnotations(AnnotationBase):
 
     def test_field(self):
@@ -141,3 +418,20 @@ class ModelRelatedObject(OrderedModel):
 
     def do_after_update(self):
         ModelTest.objects.create(title='update', num=100)
+
+    @classmethod
+    def do_after_bulk_create(cls, objs):
+        ModelTest.objects.bulk_create([ModelTest(title='create', num=99) for _ in objs])
+
+
+class ModelSparseOrdered(SparseOrderedModel):
+    title = models.CharField(max_length=100)
+    model_test = models.ForeignKey(
+        ModelTest,
+        on_delete=models.CASCADE,
+        related_name='model_sparse_ordered'
+    )
+    order_in_respect = ('model_test',)
+
+    class Meta(SparseOrderedModel.Meta):
+        indexes = [models.Index(fields=['model_test', 'order_key'])]
@@ -1,32 +1,178 @@
+import json
 import re
 
+from base64 import urlsafe_b64decode, urlsafe_b64encode
 from collections import OrderedDict
 from dataclasses import dataclass
-from typing import List
+from typing import Any, List, Optional
 
 from rest_framework.request import Request
 from rest_framework.exceptions import NotFound
-from rest_framework.utils.urls import replace_query_param
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
-from django.core.paginator import Paginator, InvalidPage
+from django.core.exceptions import ValidationError
+from django.core.paginator import EmptyPage, Paginator, InvalidPage, Page, PageNotAnInteger
+from django.db import DatabaseError
+from django.db.models import Count, F, Q, QuerySet, Window
+from django.db.models.functions import RowNumber
 from django.utils.functional import cached_property
 
 RELATED_OBJECT_PAGINATED_BY = 100
 
+COUNT_EXACT = 'exact'
+COUNT_ESTIMATE = 'estimate'
+COUNT_NONE = 'none'
+COUNT_MODES = (COUNT_EXACT, COUNT_ESTIMATE, COUNT_NONE)
+
+WINDOW_ROW_NUMBER = 'window_row_number'
+WINDOW_TOTAL = 'window_total'
+
+
+class WindowedQuerySet(QuerySet):
+    """
+    QuerySet that fetches only a window of rows of each partition, e.g. one page of lessons for each course, using
+    `ROW_NUMBER() OVER (PARTITION BY ...)`. Each object gets the total of rows of its partition in `window_total`.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._window = None
+
+    @classmethod
+    def from_queryset(cls, queryset, partition_by, start, stop):
+        windowed = cls(model=queryset.model, query=queryset.query.chain(), using=queryset._db, hints=queryset._hints)
+        windowed._window = (partition_by, start, stop)
+        return windowed
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._window = self._window
+        return clone
+
+    def _get_window_order_by(self):
+        order_by = self.query.order_by or ('pk',)
+        return [
+            F(field[1:]).desc() if field.startswith('-') else F(field).asc()
+            for field in order_by
+        ]
+
+    def _fetch_all(self):
+        if self._window is None or self._result_cache is not None:
+            return super()._fetch_all()
+
+        partition_by, start, stop = self._window
+        queryset = QuerySet(model=self.model, query=self.query.chain(), using=self._db).annotate(**{
+            WINDOW_ROW_NUMBER: Window(
+                RowNumber(), partition_by=[F(partition_by)], order_by=self._get_window_order_by()
+            ),
+            WINDOW_TOTAL: Window(Count('pk'), partition_by=[F(partition_by)]),
+        })
+        sql, params = queryset.query.sql_with_params()
+
+        raw_query = self.model._default_manager.db_manager(self.db).raw(
+            f'SELECT * FROM ({sql}) AS windowed '
+            f'WHERE {WINDOW_ROW_NUMBER} > %s AND {WINDOW_ROW_NUMBER} <= %s '
+            f'ORDER BY {WINDOW_ROW_NUMBER}',
+            (*params, start, stop)
+        )
+        self._result_cache = list(raw_query)
+
+        if self._prefetch_related_lookups and not self._prefetch_done:
+            self._prefetch_related_objects()
+
+
+class WindowedPaginator(Paginator):
+    """
+    Paginator for objects fetched by `WindowedQuerySet`, the object list is already the requested page.
+    """
+
+    @cached_property
+    def count(self):
+        return getattr(self.object_list[0], WINDOW_TOTAL) if self.object_list else 0
+
+    def page(self, number):
+        number = self.validate_number(number)
+        return Page(self.object_list, number, self)
+
+
+class ProbePaginator(Paginator):
+    """
+    Paginator that does not count the objects, it fetches one object more than the page size to know if there is a
+    next page. The count can be given when it is known from other source, like an estimate.
+    """
+
+    def __init__(self, object_list, per_page, count=None):
+        super().__init__(object_list, per_page)
+        self.known_count = count
+        self.last_page_number = 1
+
+    @property
+    def count(self):
+        return self.known_count
+
+    @property
+    def num_pages(self):
+        return self.last_page_number
+
+    def page(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('That page number is not an integer')
+        if number < 1:
+            raise EmptyPage('That page number is less than 1')
+
+        bottom = (number - 1) * self.per_page
+        objects = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if number > 1 and not objects:
+            raise EmptyPage('That page contains no results')
+
+        self.last_page_number = number + 1 if len(objects) > self.per_page else number
+        return Page(objects[:self.per_page], number, self)
+
+
+def estimate_count(queryset):
+    """Return the planner's row estimate of the queryset, falling back to the exact count."""
+    if getattr(queryset, '_result_cache', None) is not None:
+        return len(queryset._result_cache)
+    try:
+        plan = json.loads(queryset.explain(format='json'))
+        return int(plan[0]['Plan']['Plan Rows'])
+    except (DatabaseError, ValueError, TypeError, KeyError, IndexError):
+        return queryset.count()
+
 
 @dataclass
 class RelatedObjectPaginator:
     related_object_name: str
     related_object_fields: List[str]
     request: Request
+    count_mode: str = COUNT_EXACT
+    counter: Optional[str] = None
+    parent: Any = None
 
-    def paginate_queryset(self, queryset):
+    def paginate_queryset(self, queryset, parent=None):
         page_size = self.get_page_size
 
         if int(page_size) <= 0:
             raise NotFound(f'Invalid page size for `{self.related_object_name}`.')
 
-        self.paginator = Paginator(queryset, page_size)
+        count_mode = self.get_count_mode
+        if count_mode not in COUNT_MODES:
+            raise NotFound(f'Invalid count mode for `{self.related_object_name}`.')
+
+        self.parent = parent
+        if self.is_windowed(queryset):
+            self.paginator = WindowedPaginator(list(queryset), page_size)
+        elif count_mode == COUNT_EXACT:
+            self.paginator = Paginator(queryset, page_size)
+        elif count_mode == COUNT_ESTIMATE:
+            self.paginator = ProbePaginator(queryset, page_size, count=self.get_estimated_count(queryset))
+        else:
+            self.paginator = ProbePaginator(queryset, page_size)
         page_number = self.get_page_number
 
         try:
@@ -36,6 +182,22 @@ class RelatedObjectPaginator:
 
         return list(self.page)
 
+    @staticmethod
+    def is_windowed(queryset):
+        result_cache = getattr(queryset, '_result_cache', None)
+        return bool(result_cache) and hasattr(result_cache[0], WINDOW_TOTAL)
+
+    def get_window(self):
+        """Return the (start, stop) row numbers of the requested page or None for invalid pages."""
+        try:
+            page_size, page_number = int(self.get_page_size), int(self.get_page_number)
+        except ValueError:
+            return None
+        if page_size <= 0 or page_number <= 0:
+            return None
+        start = (page_number - 1) * page_size
+        return start, start + page_size
+
     @property
     def num_pages(self):
         return self.paginator.num_pages
@@ -48,6 +210,27 @@ class RelatedObjectPaginator:
                 return match.group(1)
         return 1
 
+    @cached_property
+    def get_count_mode(self):
+        for field in self.related_object_fields:
+            match = re.search(r'count\(([a-z]+)\)', field)
+            if match:
+                return match.group(1)
+        return self.count_mode
+
+    def get_estimated_count(self, queryset):
+        """
+        Return the value of the maintained counter of the parent object, e.g. `stats.num_lessons`, or the planner's
+        row estimate when there is no counter.
+        """
+        if self.counter and self.parent is not None:
+            value = self.parent
+            for attr in self.counter.split('.'):
+                value = getattr(value, attr, None)
+            if value is not None:
+                return value
+        return estimate_count(queryset)
+
     @cached_property
     def get_page_size(self):
         for field in self.related_object_fields:
@@ -87,9 +270,183 @@ class RelatedObjectPaginator:
         return ','.join(query_fields)
 
     def get_paginated_data(self, data):
-        return OrderedDict([
+        paginated_data = OrderedDict([
             ('count', self.paginator.count),
             ('next', self.get_next_link()),
             ('previous', self.get_previous_link()),
             ('results', data)
         ])
+        if self.get_count_mode == COUNT_NONE:
+            paginated_data.pop('count')
+        return paginated_data
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset pagination over `(ordering field, pk)` with opaque cursors, pages are fetched with a WHERE clause on the
+    last seen key instead of OFFSET and without COUNT, so deep pages cost the same as the first one.
+
+    The view can declare the ordering field with the `ordering` attribute, e.g. `ordering = '-created'`.
+    """
+    page_size = api_settings.PAGE_SIZE or RELATED_OBJECT_PAGINATED_BY
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    cursor_query_param = 'cursor'
+    ordering = 'pk'
+    invalid_cursor_message = 'Invalid cursor.'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.model = queryset.model
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(view)
+
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor['reverse'])
+
+        queryset = queryset.order_by(*self.get_order_by(reverse))
+        if cursor:
+            queryset = queryset.filter(self.get_keyset_filter(cursor['key'], reverse))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, cursor is not None
+
+        self.page = results
+        return results
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def get_ordering(self, view):
+        ordering = getattr(view, 'ordering', None) or self.ordering
+        if isinstance(ordering, (list, tuple)):
+            ordering = ordering[0]
+        return ordering
+
+    @property
+    def field_name(self):
+        return self.ordering.lstrip('-')
+
+    @property
+    def descending(self):
+        return self.ordering.startswith('-')
+
+    def get_order_by(self, reverse):
+        descending = self.descending != reverse
+        fields = [self.field_name] if self.field_name == 'pk' else [self.field_name, 'pk']
+        return [f'-{field}' if descending else field for field in fields]
+
+    def get_key_fields(self):
+        opts = self.model._meta
+        return [opts.pk] if self.field_name == 'pk' else [opts.get_field(self.field_name), opts.pk]
+
+    def get_keyset_filter(self, key, reverse):
+        """
+        Return the filter of the objects after the key. Nulls are sorted as larger than any value, as the database
+        does, so they come after the values going up and before them going down.
+        """
+        lookup = 'lt' if self.descending != reverse else 'gt'
+        if self.field_name == 'pk':
+            return Q(**{f'pk__{lookup}': key[-1]})
+
+        value, pk = key
+        isnull = f'{self.field_name}__isnull'
+        if value is None:
+            after_nulls = Q(**{isnull: True, f'pk__{lookup}': pk})
+            return after_nulls if lookup == 'gt' else Q(**{isnull: False}) | after_nulls
+
+        keyset_filter = Q(**{f'{self.field_name}__{lookup}': value})
+        keyset_filter |= Q(**{self.field_name: value, f'pk__{lookup}': pk})
+        if lookup == 'gt' and self.get_key_fields()[0].null:
+            keyset_filter |= Q(**{isnull: True})
+        return keyset_filter
+
+    def get_key(self, obj):
+        pk = obj['pk'] if isinstance(obj, dict) else obj.pk
+        if self.field_name == 'pk':
+            return [pk]
+
+        field = self.model._meta.get_field(self.field_name)
+        if isinstance(obj, dict):
+            # Rows of `values()` become an instance with only the ordering field to be represented as the instances.
+            obj = self.model(**{field.attname: obj[field.attname]})
+        value = getattr(obj, field.attname)
+        return [field.value_to_string(obj) if value is not None else None, pk]
+
+    def encode_cursor(self, obj, reverse):
+        cursor = json.dumps({'key': self.get_key(obj), 'reverse': reverse}, separators=(',', ':'))
+        cursor = urlsafe_b64encode(cursor.encode()).decode()
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode()).decode())
+            key, reverse = cursor['key'], bool(cursor['reverse'])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+        fields = self.get_key_fields()
+        if not isinstance(key, list) or len(key) != len(fields):
+            raise NotFound(self.invalid_cursor_message)
+
+        try:
+            key = [self.to_key_value(field, value) for field, value in zip(fields, key)]
+        except (ValidationError, TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+        return {'key': key, 'reverse': reverse}
+
+    def to_key_value(self, field, value):
+        if value is None and (field.primary_key or not field.null):
+            raise ValueError('Null key of a non null field.')
+        if isinstance(value, (list, dict)):
+            raise TypeError('Key values are scalars.')
+        return field.to_python(value) if value is not None else None
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
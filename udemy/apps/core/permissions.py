@@ -1,7 +1,114 @@
+from django.conf import settings
+from django.db.models import BooleanField, Case, Value, When
+from django.utils.functional import cached_property
+
 from rest_framework import permissions
 from rest_framework.permissions import SAFE_METHODS
 
-from udemy.apps.course.models import Course
+from udemy.apps.course.models import Course, CourseRelation
+
+ENROLLED = 'enrolled'
+INSTRUCTOR = 'instructor'
+
+MEMBERSHIP_CLAIM = 'courses'
+
+
+class CourseMembership:
+    """
+    The ids of the courses where the user is enrolled or instructor, loaded once, lazily, with a single query.
+
+    When `COURSE_MEMBERSHIP_CLAIMS` is enabled the access tokens carry the ids in the `courses` claim, with the user's
+    `membership_version`, the ids of a claim of the current version are used without queries.
+    """
+
+    def __init__(self, user, claim=None):
+        self.user = user
+        self.from_claim = False
+
+        if claim is not None and claim.get('v') == getattr(user, 'membership_version', None):
+            self.course_ids = {ENROLLED: set(claim['e']), INSTRUCTOR: set(claim['i'])}
+            self.from_claim = True
+
+    @cached_property
+    def course_ids(self):
+        enrolled = CourseRelation.objects.filter(creator_id=self.user.id).annotate(
+            membership=Value(ENROLLED)
+        ).values_list('course_id', 'membership').order_by()
+        instructor = Course.instructors.through.objects.filter(user_id=self.user.id).annotate(
+            membership=Value(INSTRUCTOR)
+        ).values_list('course_id', 'membership').order_by()
+
+        course_ids = {ENROLLED: set(), INSTRUCTOR: set()}
+        for course_id, membership in enrolled.union(instructor, all=True):
+            course_ids[membership].add(course_id)
+        return course_ids
+
+    def is_enrolled(self, course_id):
+        return course_id in self.course_ids[ENROLLED]
+
+    def is_instructor(self, course_id):
+        return course_id in self.course_ids[INSTRUCTOR]
+
+    def get_expression(self, membership, ref_name):
+        """Return a boolean expression that tells if the course referenced by `ref_name` is in the membership."""
+        return Case(
+            When(**{f'{ref_name}__in': self.course_ids[membership]}, then=Value(True)),
+            default=Value(False),
+            output_field=BooleanField(),
+        )
+
+    def get_claim(self):
+        """
+        Return the claim of the memberships for access tokens, or None when the user has more courses than
+        `COURSE_MEMBERSHIP_CLAIMS_MAX_COURSES`, then the memberships are loaded from the database.
+        """
+        enrolled, instructor = self.course_ids[ENROLLED], self.course_ids[INSTRUCTOR]
+        if len(enrolled) + len(instructor) > settings.COURSE_MEMBERSHIP_CLAIMS_MAX_COURSES:
+            return None
+        return {'v': self.user.membership_version, 'e': sorted(enrolled), 'i': sorted(instructor)}
+
+
+def get_course_membership(request):
+    """
+    Return the course membership of the request's user, it is kept in the request until the user or the memberships
+    of the request change.
+    """
+    http_request = getattr(request, '_request', request)
+    membership = getattr(http_request, 'course_membership', None)
+    if membership is None or membership.user != request.user:
+        claim = None
+        token = getattr(request, 'auth', None)
+        changed = getattr(http_request, 'course_membership_changed', False)
+        if settings.COURSE_MEMBERSHIP_CLAIMS and not changed and token is not None and hasattr(token, 'get'):
+            claim = token.get(MEMBERSHIP_CLAIM)
+        membership = CourseMembership(request.user, claim)
+        http_request.course_membership = membership
+    return membership
+
+
+def get_course_scope(request, course_id):
+    """Return the permission scope of the request's user in the course: anonymous, visitor, enrolled or instructor."""
+    if not request.user or not request.user.is_authenticated:
+        return 'anonymous'
+
+    membership = get_course_membership(request)
+    if membership.is_instructor(course_id):
+        return INSTRUCTOR
+    if membership.is_enrolled(course_id):
+        return ENROLLED
+    return 'visitor'
+
+
+def clear_course_membership(request):
+    """Forget the course membership of the request, the claims of its token are outdated from now on."""
+    http_request = getattr(request, '_request', request)
+    if http_request is not None:
+        http_request.__dict__.pop('course_membership', None)
+        http_request.course_membership_changed = True
+
+
+def get_course_id(obj):
+    return obj.id if isinstance(obj, Course) else obj.course_id
 
 
 class IsInstructor(permissions.BasePermission):
@@ -14,9 +121,7 @@ class IsInstructor(permissions.BasePermission):
         if hasattr(obj, 'is_instructor'):
             return obj.is_instructor
 
-        course = obj if isinstance(obj, Course) else obj.course
-        is_instructor = course.instructors.filter(id=request.user.id).exists()
-        return is_instructor
+        return get_course_membership(request).is_instructor(get_course_id(obj))
 
 
 class IsAdminOrReadOnly(permissions.BasePermission):
@@ -49,7 +154,6 @@ class IsEnrolled(permissions.BasePermission):
         if hasattr(obj, 'is_enrolled') or hasattr(obj, 'is_instructor'):
             return obj.is_enrolled or obj.is_instructor
 
-        course = obj if isinstance(obj, Course) else obj.course
-        is_enrolled = request.user.enrolled_courses.filter(id=course.id).exists()
-        is_instructor = course.instructors.filter(id=request.user.id).exists()
-        return is_enrolled or is_instructor
+        membership = get_course_membership(request)
+        course_id = get_course_id(obj)
+        return membership.is_enrolled(course_id) or membership.is_instructor(course_id)
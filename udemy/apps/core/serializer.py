@@ -10,6 +10,7 @@ class ModelSerializer(
     serializer.CreateAndUpdateOnlyFieldsMixin,
     serializer.PermissionForFieldMixin,
     serializer.AnnotationFieldMixin,
+    serializer.ValuesSerializerMixin,
     serializers.ModelSerializer,
 ):
     """
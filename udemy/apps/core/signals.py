@@ -0,0 +1,7 @@
+from django.db.models.signals import ModelSignal
+
+# Sent by `OrderedModel.reorder` with the first object in respect as `instance` and the reordered `pks`.
+post_reorder = ModelSignal(use_caching=True)
+
+# Sent by the bulk inserts of ordered models, which don't send `post_save`, with the created `objs`.
+post_bulk_create = ModelSignal(use_caching=True)
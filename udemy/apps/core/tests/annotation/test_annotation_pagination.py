@@ -0,0 +1,65 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import path
+
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+from rest_framework.viewsets import ModelViewSet
+
+from tests.factories.course import CourseFactory
+from tests.factories.module import ModuleFactory
+
+from udemy.apps.core.mixins.view import AnnotationViewMixin, DynamicFieldViewMixin
+from udemy.apps.course.models import Course
+from udemy.apps.course.serializer import CourseSerializer
+
+
+class Pagination(PageNumberPagination):
+    page_size = 2
+
+
+class CourseViewSet(AnnotationViewMixin, DynamicFieldViewMixin, ModelViewSet):
+    queryset = Course.objects.all()
+    serializer_class = CourseSerializer
+    pagination_class = Pagination
+
+
+urlpatterns = [
+    path('test/', CourseViewSet.as_view({'get': 'list'}), name='test-list'),
+    path('test/<int:pk>/', CourseViewSet.as_view({'get': 'retrieve'}), name='test-retrieve'),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class TestAnnotationPagination(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.courses = CourseFactory.create_batch(3)
+        for index, course in enumerate(self.courses, start=1):
+            ModuleFactory.create_batch(index, course=course)
+
+    def test_annotations_are_attached_to_page_objects(self):
+        response = self.client.get(f'{reverse("test-list")}?fields=id,num_modules')
+
+        assert response.data['results'] == [
+            {'id': self.courses[0].id, 'num_modules': 1},
+            {'id': self.courses[1].id, 'num_modules': 2},
+        ]
+
+    def test_annotations_are_restricted_to_page(self):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(f'{reverse("test-list")}?fields=id,num_modules')
+
+        grouped_queries = [query['sql'] for query in context.captured_queries if 'GROUP BY' in query['sql']]
+
+        assert len(grouped_queries) == 1
+        assert ' IN (' in grouped_queries[0]
+
+    def test_retrieve_annotates_queryset(self):
+        course = self.courses[2]
+
+        response = self.client.get(f'{reverse("test-retrieve", kwargs={"pk": course.id})}?fields=id,num_modules')
+
+        assert response.data == {'id': course.id, 'num_modules': 3}
@@ -0,0 +1,49 @@
+from django.db.models import Avg, Count, IntegerField, Subquery, Sum
+from django.test import TestCase
+
+from tests.factories.course import CourseFactory
+from tests.factories.lesson import LessonFactory
+from tests.factories.module import ModuleFactory
+from tests.factories.rating import RatingFactory
+
+from udemy.apps.course.models import Course
+
+
+class TestAnnotationSubquery(TestCase):
+    def setUp(self):
+        self.annotation_class = Course.annotation_class
+        self.course = CourseFactory()
+        module = ModuleFactory(course=self.course)
+        LessonFactory(course=self.course, module=module, video_duration=10)
+        LessonFactory(course=self.course, module=module, video_duration=20)
+        RatingFactory.create_batch(3, course=self.course)
+        self.annotations = {
+            'num_ratings': Count('ratings', distinct=True),
+            'rating_avg': Avg('ratings__rating', default=0),
+            'num_lessons': Count('lessons', distinct=True),
+            'video_duration': Sum('lessons__video_duration', output_field=IntegerField(), default=0),
+        }
+
+    def test_single_to_many_relation_is_not_compiled(self):
+        annotations = {
+            'num_lessons': self.annotations['num_lessons'],
+            'video_duration': self.annotations['video_duration'],
+        }
+
+        compiled = self.annotation_class.compile_annotations(Course, annotations)
+
+        assert not any(isinstance(annotation, Subquery) for annotation in compiled.values())
+
+    def test_distinct_to_many_relations_are_compiled(self):
+        compiled = self.annotation_class.compile_annotations(Course, self.annotations)
+
+        assert all(isinstance(annotation, Subquery) for annotation in compiled.values())
+
+    def test_compiled_annotations_are_not_multiplied_by_other_joins(self):
+        compiled = self.annotation_class.compile_annotations(Course, self.annotations)
+
+        course = Course.objects.annotate(**compiled).get(id=self.course.id)
+
+        assert course.num_ratings == 3
+        assert course.num_lessons == 2
+        assert course.video_duration == 30
@@ -78,3 +78,23 @@ class TestRelatedObjectFilter(TestCase):
         filter_kwargs = serializer._get_related_object_option('model_related', 'filter')
 
         assert filter_kwargs == {'title__startswith': 'test'}
+
+    def test_related_object_filter_is_pushed_to_prefetch(self):
+        model_tests = [ModelTest.objects.create(title=f'test {index}') for index in range(3)]
+        for model_test in model_tests:
+            ModelRelatedObject.objects.create(title='test_', model_test=model_test)
+            ModelRelatedObject.objects.create(title='no_test', model_test=model_test)
+
+        context = {'related_objects': {'model_related': ['@all']}}
+        queryset = ModelTest.objects.filter(id__in=[model_test.id for model_test in model_tests]).order_by('id')
+        queryset = ModelTestSerializer(context=context).auto_optimize_related_object(queryset)
+
+        with self.assertNumQueries(2):
+            serializer = ModelTestSerializer(queryset, many=True, context=context)
+            data = serializer.data
+
+        assert [len(item['model_related']) for item in data] == [1, 1, 1]
+        assert all(
+            related['title'] == 'test_'
+            for item in data for related in item['model_related']
+        )
@@ -1,12 +1,15 @@
 from unittest.mock import patch
 
+from django.db import connection
 from django.test import TestCase, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import path
 
 from rest_framework import status
 from rest_framework.reverse import reverse
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.test import APIClient
+from rest_framework.request import Request
 
 from udemy.apps.core.mixins.view import RelatedObjectViewMixin, DynamicFieldViewMixin
 from udemy.apps.core.models import ModelTest, ModelRelatedObject
@@ -120,3 +123,100 @@ class TestRelatedObjectPaginator(TestCase):
 
         assert response.status_code == status.HTTP_404_NOT_FOUND
         assert response.data == {'detail': 'Invalid page for `model_related`.'}
+
+    def test_related_objects_are_windowed_in_prefetch(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(
+                f'{self.url}?fields[model_related]=@all,page_size(2),page(2)&fields=id,title,model_related'
+            )
+
+        related_query = context.captured_queries[-1]['sql']
+
+        assert 'ROW_NUMBER() OVER' in related_query
+        assert response.data['model_related']['count'] == 4
+        assert [item['id'] for item in response.data['model_related']['results']] == [self.model_3.id, self.model_4.id]
+
+    def test_empty_related_objects_are_windowed(self):
+        model_test = ModelTest.objects.create(title='empty')
+        url = reverse('test-retrieve', kwargs={'pk': model_test.id})
+
+        response = self.client.get(f'{url}?fields[model_related]=@all,page_size(2)&fields=id,title,model_related')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['model_related'] == []
+
+    @patch('udemy.apps.core.paginator.RELATED_OBJECT_PAGINATED_BY', 2)
+    def test_count_none_omits_count(self):
+        response = self.client.get(f'{self.url}?fields[model_related]=@all,count(none)&fields=id,title,model_related')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert 'count' not in response.data['model_related']
+        assert response.data['model_related']['next'] is not None
+
+    def test_404_for_invalid_count_mode(self):
+        response = self.client.get(f'{self.url}?fields[model_related]=@all,count(foo)')
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+        assert response.data == {'detail': 'Invalid count mode for `model_related`.'}
+
+    def test_count_none_does_not_count_related_objects(self):
+        context = {'request': Request(request), 'related_objects': {'model_related': ['@all', 'page_size(3)', 'count(none)']}}
+        serializer = ModelTestSerializer(self.model_test, context=context)
+
+        with CaptureQueriesContext(connection) as queries:
+            data = serializer.data
+
+        assert not any('COUNT(' in query['sql'] for query in queries.captured_queries)
+        assert 'count' not in data['model_related']
+        assert data['model_related']['next'] is not None
+        assert [item['id'] for item in data['model_related']['results']] == [
+            self.model_1.id, self.model_2.id, self.model_3.id
+        ]
+
+    def test_count_estimate_reads_counter_of_parent(self):
+        class CounterSerializer(ModelTestSerializer):
+            class Meta(ModelTestSerializer.Meta):
+                related_objects = {
+                    'model_related': {
+                        'serializer': RelatedObjectSerializer,
+                        'many': True,
+                        'count': 'estimate',
+                        'counter': 'num_related'
+                    }
+                }
+
+        self.model_test.num_related = 10
+        context = {'request': Request(request), 'related_objects': {'model_related': ['@all', 'page_size(3)', 'page(2)']}}
+        serializer = CounterSerializer(self.model_test, context=context)
+
+        data = serializer.data
+
+        assert data['model_related']['count'] == 10
+        assert data['model_related']['next'] is None
+        assert [item['id'] for item in data['model_related']['results']] == [self.model_4.id]
+
+    def test_count_estimate_selects_relation_of_counter(self):
+        class CounterSerializer(RelatedObjectSerializer):
+            class Meta(RelatedObjectSerializer.Meta):
+                related_objects = {
+                    'models_tests': {
+                        'serializer': ModelTestSerializer,
+                        'many': True,
+                        'count': 'estimate',
+                        'counter': 'model_test.num'
+                    }
+                }
+
+        context = {'request': Request(request), 'related_objects': {'models_tests': ['id', 'title']}}
+        serializer = CounterSerializer(fields=['id', 'title', 'models_tests'], context=context)
+
+        queryset = ModelRelatedObject.objects.only(*serializer.get_only_fields())
+        queryset = serializer.optimize_related_object_counters(queryset)
+        related_objects = list(queryset)
+
+        with CaptureQueriesContext(connection) as queries:
+            counters = [related_object.model_test.num for related_object in related_objects]
+
+        assert 'model_test' in queryset.query.select_related
+        assert counters == [0, 0, 0, 0]
+        assert len(queries.captured_queries) == 0
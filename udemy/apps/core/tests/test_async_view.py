@@ -0,0 +1,138 @@
+import asyncio
+
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import path
+
+from rest_framework import status
+from rest_framework.permissions import BasePermission
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+from rest_framework.viewsets import ModelViewSet
+
+from udemy.apps.core.mixins.view import AsyncReadViewMixin, DynamicFieldViewMixin, RelatedObjectViewMixin
+from udemy.apps.core.models import ModelTest, ModelRelatedObject
+from udemy.apps.core.serializer import ModelSerializer
+from tests.factories.user import UserFactory
+
+
+class DenyTitle(BasePermission):
+    def has_object_permission(self, request, view, obj):
+        return obj.title != 'denied'
+
+
+class AsyncRelatedObjectSerializer(ModelSerializer):
+    class Meta:
+        model = ModelRelatedObject
+        fields = ('id', 'title')
+
+
+class AsyncModelTestSerializer(ModelSerializer):
+    class Meta:
+        model = ModelTest
+        fields = ('id', 'title')
+        related_objects = {
+            'model_related': {
+                'serializer': AsyncRelatedObjectSerializer,
+                'many': True
+            }
+        }
+
+
+class AsyncModelTestViewSet(AsyncReadViewMixin, RelatedObjectViewMixin, DynamicFieldViewMixin, ModelViewSet):
+    queryset = ModelTest.objects.all()
+    serializer_class = AsyncModelTestSerializer
+    permission_classes = [DenyTitle]
+    pagination_class = None
+
+
+urlpatterns = [
+    path('test/', AsyncModelTestViewSet.as_view({'get': 'list', 'post': 'create'}), name='test-list'),
+    path('test/<int:pk>/', AsyncModelTestViewSet.as_view({'get': 'retrieve'}), name='test-retrieve'),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class TestAsyncReadView(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.model_test = ModelTest.objects.create(title='test')
+        self.related = ModelRelatedObject.objects.create(title='related', model_test=self.model_test)
+
+    def test_read_actions_are_coroutines(self):
+        assert asyncio.iscoroutinefunction(AsyncModelTestViewSet.as_view({'get': 'list'}))
+
+    def test_async_list(self):
+        url = reverse('test-list')
+        response = self.client.get(f'{url}?fields=id,title,model_related&fields[model_related]=id,title')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert {'id': self.model_test.id, 'title': 'test', 'model_related': [
+            {'id': self.related.id, 'title': 'related'}
+        ]} in response.data
+
+    def test_async_retrieve(self):
+        url = reverse('test-retrieve', kwargs={'pk': self.model_test.id})
+        response = self.client.get(f'{url}?fields=id,title,model_related&fields[model_related]=id,title')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == {
+            'id': self.model_test.id,
+            'title': 'test',
+            'model_related': [{'id': self.related.id, 'title': 'related'}],
+        }
+
+    def test_async_retrieve_not_found(self):
+        response = self.client.get(reverse('test-retrieve', kwargs={'pk': self.model_test.id + 100}))
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_async_retrieve_object_permission(self):
+        model_test = ModelTest.objects.create(title='denied')
+        self.client.force_authenticate(UserFactory())
+        response = self.client.get(reverse('test-retrieve', kwargs={'pk': model_test.id}))
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+    def test_sync_actions(self):
+        response = self.client.post(reverse('test-list'), {'title': 'created'})
+
+        assert response.status_code == status.HTTP_201_CREATED
+        assert ModelTest.objects.filter(title='created').exists()
+
+
+@override_settings(ROOT_URLCONF=__name__, ASYNC_VIEW_CONCURRENT_QUERIES=True)
+class TestAsyncReadViewConcurrentQueries(TransactionTestCase):
+    def test_async_list_with_concurrent_queries(self):
+        model_test = ModelTest.objects.create(title='test')
+        related = ModelRelatedObject.objects.create(title='related', model_test=model_test)
+
+        url = reverse('test-list')
+        response = APIClient().get(f'{url}?fields=id,title,model_related&fields[model_related]=id,title')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert {'id': model_test.id, 'title': 'test', 'model_related': [
+            {'id': related.id, 'title': 'related'}
+        ]} in response.data
+
+    def test_async_retrieve_with_concurrent_queries(self):
+        model_test = ModelTest.objects.create(title='test')
+        related = ModelRelatedObject.objects.create(title='related', model_test=model_test)
+
+        url = reverse('test-retrieve', kwargs={'pk': model_test.id})
+        response = APIClient().get(f'{url}?fields=id,title,model_related&fields[model_related]=id,title')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == {
+            'id': model_test.id,
+            'title': 'test',
+            'model_related': [{'id': related.id, 'title': 'related'}],
+        }
+
+    def test_async_retrieve_object_permission_with_concurrent_queries(self):
+        model_test = ModelTest.objects.create(title='denied')
+        client = APIClient()
+        client.force_authenticate(UserFactory())
+
+        response = client.get(reverse('test-retrieve', kwargs={'pk': model_test.id}))
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
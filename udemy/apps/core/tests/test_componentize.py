@@ -0,0 +1,232 @@
+import asyncio
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import path
+
+from rest_framework import serializers, status
+from rest_framework.permissions import BasePermission
+from rest_framework.request import Request
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework.viewsets import ModelViewSet
+
+from udemy.apps.core.decorator import COMPONENTS_MAX_WORKERS, ComponentCache, component, componentize, components_list
+from udemy.apps.core.models import ModelTest
+from tests.factories.user import UserFactory
+
+
+class AllowObject(BasePermission):
+    def has_object_permission(self, request, view, obj):
+        return True
+
+
+class DenyObject(BasePermission):
+    def has_object_permission(self, request, view, obj):
+        return False
+
+
+@component(name='test_slow_1')
+def slow_component_1(request, *args, **kwargs):
+    time.sleep(0.3)
+    return 1
+
+
+@component(name='test_slow_2')
+def slow_component_2(request, *args, **kwargs):
+    time.sleep(0.3)
+    return 2
+
+
+@component(name='test_async')
+async def async_component(request, *args, **kwargs):
+    await asyncio.sleep(0.3)
+    return 3
+
+
+@component(name='test_timeout', timeout=0.05)
+def timeout_component(request, *args, **kwargs):
+    time.sleep(0.3)
+    return 4
+
+
+@component(name='test_allowed_1', permission_classes=[AllowObject])
+def allowed_component_1(request, *args, **kwargs):
+    return 5
+
+
+@component(name='test_allowed_2', permission_classes=[AllowObject])
+def allowed_component_2(request, *args, **kwargs):
+    return 6
+
+
+@component(name='test_denied', permission_classes=[DenyObject])
+def denied_component(request, *args, **kwargs):
+    return 7
+
+
+cached_calls = []
+
+
+@component(name='test_cached', component_cache={'models': [ModelTest]})
+def cached_component(request, *args, **kwargs):
+    cached_calls.append(request.user.pk)
+    return len(cached_calls)
+
+
+@component(name='test_cached_user', component_cache={'scope': 'user'})
+def cached_user_component(request, *args, **kwargs):
+    cached_calls.append(request.user.pk)
+    return request.user.pk
+
+
+class ModelTestSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ModelTest
+        fields = ('id', 'title')
+
+
+class ModelTestViewSet(ModelViewSet):
+    queryset = ModelTest.objects.all()
+    serializer_class = ModelTestSerializer
+
+    @componentize(result_name='object')
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+
+urlpatterns = [
+    path('test/<int:pk>/', ModelTestViewSet.as_view({'get': 'retrieve'}), name='test-retrieve')
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class TestComponentize(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.model_test = ModelTest.objects.create(title='test')
+        self.url = reverse('test-retrieve', kwargs={'pk': self.model_test.id})
+
+    def test_components_run_concurrently(self):
+        started = time.monotonic()
+        response = self.client.get(f'{self.url}?components=test_slow_1,test_slow_2,test_async')
+        elapsed = time.monotonic() - started
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data == {
+            'object': {'id': self.model_test.id, 'title': self.model_test.title},
+            'test_slow_1': 1,
+            'test_slow_2': 2,
+            'test_async': 3,
+        }
+        assert elapsed < 0.6
+
+    def test_components_share_a_bounded_thread_pool(self):
+        for _ in range(3):
+            self.client.get(f'{self.url}?components=test_slow_1,test_slow_2,test_timeout')
+
+        component_threads = [thread for thread in threading.enumerate() if thread.name.startswith('component')]
+        assert 0 < len(component_threads) <= COMPONENTS_MAX_WORKERS
+
+    def test_slow_component_times_out(self):
+        response = self.client.get(f'{self.url}?components=test_timeout,test_allowed_1')
+
+        assert response.data['test_timeout'] == {'details': 'Timeout for component test_timeout'}
+        assert response.data['test_allowed_1'] == 5
+
+    def test_object_is_fetched_once_for_permissions(self):
+        with patch.object(ModelTestViewSet, 'get_object', autospec=True,
+                          side_effect=ModelTestViewSet.get_object) as get_object:
+            response = self.client.get(f'{self.url}?components=test_allowed_1,test_allowed_2')
+
+        assert response.status_code == status.HTTP_200_OK
+        assert get_object.call_count == 2
+        assert response.data['test_allowed_1'] == 5
+        assert response.data['test_allowed_2'] == 6
+
+    def test_component_permission_denied(self):
+        response = self.client.get(f'{self.url}?components=test_allowed_1,test_denied')
+
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+        assert response.data == {'details': 'Access denied for component test_denied'}
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class TestComponentCache(TestCase):
+    def setUp(self):
+        cache.clear()
+        cached_calls.clear()
+        self.client = APIClient()
+        self.model_test = ModelTest.objects.create(title='test')
+        self.url = reverse('test-retrieve', kwargs={'pk': self.model_test.id})
+
+    def test_component_result_is_cached(self):
+        self.client.get(f'{self.url}?components=test_cached')
+        response = self.client.get(f'{self.url}?components=test_cached')
+
+        assert response.data['test_cached'] == 1
+        assert len(cached_calls) == 1
+
+    def test_component_cache_key_includes_url_kwargs(self):
+        other = ModelTest.objects.create(title='other')
+        self.client.get(f'{self.url}?components=test_cached')
+        response = self.client.get(f'{reverse("test-retrieve", kwargs={"pk": other.id})}?components=test_cached')
+
+        assert response.data['test_cached'] == 2
+
+    def test_component_cache_is_invalidated_by_model_changes(self):
+        self.client.get(f'{self.url}?components=test_cached')
+        self.model_test.title = 'changed'
+        self.model_test.save()
+        response = self.client.get(f'{self.url}?components=test_cached')
+
+        assert response.data['test_cached'] == 2
+
+    def test_component_cache_user_scope(self):
+        user, other = UserFactory(), UserFactory()
+
+        self.client.force_authenticate(user)
+        self.client.get(f'{self.url}?components=test_cached_user')
+        response = self.client.get(f'{self.url}?components=test_cached_user')
+        assert response.data['test_cached_user'] == user.id
+
+        self.client.force_authenticate(other)
+        response = self.client.get(f'{self.url}?components=test_cached_user')
+        assert response.data['test_cached_user'] == other.id
+        assert cached_calls == [user.id, other.id]
+
+    def test_component_cache_computes_missing_result_once(self):
+        component_cache = components_list['test_cached'].cache
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return 'result'
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = list(executor.map(lambda _: component_cache.get_or_compute('stampede', compute), range(4)))
+
+        assert results == ['result'] * 4
+        assert len(calls) == 1
+
+    def test_enrollment_scope_without_course_kwarg_is_kept_per_user(self):
+        component_cache = ComponentCache('test_enrollment_without_kwarg', scope='enrollment')
+        user, other = UserFactory(), UserFactory()
+        request = Request(APIRequestFactory().get('/'))
+
+        request.user = user
+        key = component_cache.get_key(request, (), {'course_id': 1})
+        assert component_cache.get_scope(request, {}) == f'user:{user.id}'
+
+        request.user = other
+        assert component_cache.get_key(request, (), {'course_id': 1}) != key
+
+    def test_invalid_cache_scope(self):
+        with self.assertRaises(ValueError):
+            ComponentCache('test_invalid', scope='invalid')
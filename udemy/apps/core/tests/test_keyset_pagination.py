@@ -0,0 +1,157 @@
+import json
+
+from base64 import urlsafe_b64encode
+
+from django.test import TestCase, override_settings
+from django.urls import path
+
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+from rest_framework.viewsets import ModelViewSet
+
+from udemy.apps.core.mixins.view import DynamicFieldViewMixin
+from udemy.apps.core.models import ModelTest, ModelRelatedObject
+from udemy.apps.core.paginator import KeysetPagination
+from udemy.apps.core.serializer import ModelSerializer
+
+
+class ModelTestSerializer(ModelSerializer):
+    class Meta:
+        model = ModelTest
+        fields = ('id', 'title', 'num')
+
+
+class Pagination(KeysetPagination):
+    page_size = 2
+
+
+class ModelTestViewSet(DynamicFieldViewMixin, ModelViewSet):
+    queryset = ModelTest.objects.all()
+    serializer_class = ModelTestSerializer
+    pagination_class = Pagination
+
+
+class ModelTestOrderedViewSet(ModelTestViewSet):
+    ordering = '-num'
+
+
+class RelatedObjectSerializer(ModelSerializer):
+    class Meta:
+        model = ModelRelatedObject
+        fields = ('id', 'title', 'order')
+
+
+class RelatedObjectViewSet(ModelViewSet):
+    queryset = ModelRelatedObject.objects.all()
+    serializer_class = RelatedObjectSerializer
+    pagination_class = Pagination
+    ordering = 'order'
+
+
+class RelatedObjectDescendingViewSet(RelatedObjectViewSet):
+    ordering = '-order'
+
+
+urlpatterns = [
+    path('test/', ModelTestViewSet.as_view({'get': 'list'}), name='test-list'),
+    path('ordered/', ModelTestOrderedViewSet.as_view({'get': 'list'}), name='ordered-list'),
+    path('nullable/', RelatedObjectViewSet.as_view({'get': 'list'}), name='nullable-list'),
+    path('descending/', RelatedObjectDescendingViewSet.as_view({'get': 'list'}), name='descending-list'),
+]
+
+
+def encode_cursor(key, reverse=False):
+    return urlsafe_b64encode(json.dumps({'key': key, 'reverse': reverse}).encode()).decode()
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class TestKeysetPagination(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.models = [ModelTest.objects.create(title=f'test {num}', num=num % 3) for num in range(5)]
+
+    def get_all_pages(self, url):
+        ids, previous = [], None
+        while url:
+            response = self.client.get(url)
+            assert response.status_code == status.HTTP_200_OK
+            ids += [item['id'] for item in response.data['results']]
+            url, previous = response.data['next'], response.data['previous']
+        return ids, previous
+
+    def test_first_page(self):
+        response = self.client.get(reverse('test-list'))
+
+        assert [item['id'] for item in response.data['results']] == [model.id for model in self.models[:2]]
+        assert response.data['previous'] is None
+        assert response.data['next'] is not None
+        assert 'count' not in response.data
+
+    def test_walk_through_pages(self):
+        ids, previous = self.get_all_pages(reverse('test-list'))
+
+        assert ids == [model.id for model in self.models]
+        assert previous is not None
+
+    def test_previous_page(self):
+        response = self.client.get(reverse('test-list'))
+        response = self.client.get(response.data['next'])
+        response = self.client.get(response.data['previous'])
+
+        assert [item['id'] for item in response.data['results']] == [model.id for model in self.models[:2]]
+        assert response.data['previous'] is None
+
+    def test_view_ordering_with_ties(self):
+        ids, _ = self.get_all_pages(reverse('ordered-list'))
+
+        expected = sorted(self.models, key=lambda model: (-model.num, -model.id))
+        assert ids == [model.id for model in expected]
+
+    def test_fields_are_kept_in_links(self):
+        response = self.client.get(f'{reverse("test-list")}?fields=id')
+
+        assert 'fields=id' in response.data['next']
+        assert response.data['results'][0] == {'id': self.models[0].id}
+
+    def test_invalid_cursor(self):
+        response = self.client.get(f'{reverse("test-list")}?cursor=invalid')
+
+        assert response.status_code == status.HTTP_404_NOT_FOUND
+
+    def test_malformed_cursor_keys(self):
+        cursors = [
+            ('test-list', ['abc']),
+            ('test-list', [None]),
+            ('test-list', [[1]]),
+            ('ordered-list', ['abc', 1]),
+            ('ordered-list', [None, 1]),
+            ('ordered-list', [1, [1]]),
+        ]
+        for url_name, key in cursors:
+            response = self.client.get(reverse(url_name), {'cursor': encode_cursor(key)})
+
+            assert response.status_code == status.HTTP_404_NOT_FOUND, key
+
+    def test_walk_through_null_keys(self):
+        model_test = ModelTest.objects.create(title='parent')
+        objs = [ModelRelatedObject.objects.create(title=f'test {num}', model_test=model_test) for num in range(5)]
+        ModelRelatedObject.objects.filter(id__in=[objs[1].id, objs[3].id]).update(order=None)
+
+        ids, _ = self.get_all_pages(reverse('nullable-list'))
+        descending_ids, _ = self.get_all_pages(reverse('descending-list'))
+
+        assert ids == [objs[0].id, objs[2].id, objs[4].id, objs[1].id, objs[3].id]
+        assert descending_ids == [objs[3].id, objs[1].id, objs[4].id, objs[2].id, objs[0].id]
+
+    def test_previous_page_of_null_keys(self):
+        model_test = ModelTest.objects.create(title='parent')
+        objs = [ModelRelatedObject.objects.create(title=f'test {num}', model_test=model_test) for num in range(5)]
+        ModelRelatedObject.objects.filter(id__in=[objs[3].id, objs[4].id]).update(order=None)
+
+        response = self.client.get(reverse('nullable-list'))
+        response = self.client.get(response.data['next'])
+        response = self.client.get(response.data['next'])
+        response = self.client.get(response.data['previous'])
+
+        assert [item['id'] for item in response.data['results']] == [objs[2].id, objs[3].id]
@@ -1,9 +1,11 @@
 from django.core.exceptions import ValidationError
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from parameterized import parameterized
 
-from udemy.apps.core.models import ModelTest, ModelRelatedObject
+from udemy.apps.core.models import ModelTest, ModelRelatedObject, ModelSparseOrdered
 
 
 class TestOrderedModel(TestCase):
@@ -106,5 +108,165 @@ class TestOrderedModel(TestCase):
             assert model.order == index
 
 
+class TestSparseOrderedModel(TestCase):
+    def setUp(self):
+        self.model_test = ModelTest.objects.create(title='test')
+        self.objs = [
+            ModelSparseOrdered.objects.create(title=str(index), model_test=self.model_test) for index in range(1, 11)
+        ]
+
+    def get_titles(self):
+        return [obj.title for obj in ModelSparseOrdered.objects.filter(model_test=self.model_test)]
+
+    def test_order_generation(self):
+        other = ModelSparseOrdered.objects.create(title='1', model_test=ModelTest.objects.create(title='other'))
+
+        assert [obj.order for obj in self.objs] == list(range(1, 11))
+        assert other.order == 1
+        for index, obj in enumerate(ModelSparseOrdered.objects.filter(model_test=self.model_test), start=1):
+            assert obj.order == index
+
+    def test_filter_by_order(self):
+        assert ModelSparseOrdered.objects.get(model_test=self.model_test, order=5) == self.objs[4]
+
+    @parameterized.expand([
+        (3, 6),
+        (8, 2),
+        (1, 10),
+        (10, 1),
+        (5, 5),
+    ])
+    def test_move_writes_one_row(self, current_order, new_order):
+        obj = ModelSparseOrdered.objects.get(model_test=self.model_test, order=current_order)
+        titles = self.get_titles()
+        titles.insert(new_order - 1, titles.pop(current_order - 1))
+
+        obj.order = new_order
+        with CaptureQueriesContext(connection) as context:
+            obj.save()
+
+        updates = [query['sql'] for query in context.captured_queries if query['sql'].startswith('UPDATE')]
+        assert len(updates) == 1
+        assert self.get_titles() == titles
+        obj.refresh_from_db()
+        assert obj.order == new_order
+
+    def test_delete_keeps_dense_order(self):
+        with CaptureQueriesContext(connection) as context:
+            self.objs[4].delete()
+
+        assert not [query for query in context.captured_queries if query['sql'].startswith('UPDATE')]
+        for index, obj in enumerate(ModelSparseOrdered.objects.filter(model_test=self.model_test), start=1):
+            assert obj.order == index
+
+    def test_rebalance_when_there_is_no_gap(self):
+        ModelSparseOrdered.objects.filter(pk=self.objs[0].pk).update(order_key=1)
+        ModelSparseOrdered.objects.filter(pk=self.objs[1].pk).update(order_key=2)
+        obj = ModelSparseOrdered.objects.get(pk=self.objs[9].pk)
+
+        obj.order = 2
+        obj.save()
+
+        assert self.get_titles() == ['1', '10', '2', '3', '4', '5', '6', '7', '8', '9']
+        keys = list(ModelSparseOrdered.objects.filter(model_test=self.model_test).values_list('order_key', flat=True))
+        assert len(set(keys)) == 10
+
+    def test_cant_save_order_greater_than_last_order(self):
+        obj = self.objs[0]
+
+        with self.assertRaises(ValidationError):
+            obj.order = 12
+            obj.save()
+
+
+class TestReorder(TestCase):
+    def setUp(self):
+        self.model_test = ModelTest.objects.create(title='test')
+        self.objs = create_model_in_batch(5, title='title', model_test=self.model_test)
+        self.other = ModelRelatedObject.objects.create(title='other', model_test=ModelTest.objects.create(title='o'))
+
+    def test_reorder_in_one_update(self):
+        pks = [obj.pk for obj in reversed(self.objs)]
+
+        with CaptureQueriesContext(connection) as context:
+            ModelRelatedObject.reorder(pks)
+
+        updates = [query['sql'] for query in context.captured_queries if query['sql'].startswith('UPDATE')]
+        assert len(updates) == 1
+        assert list(ModelRelatedObject.objects.filter(model_test=self.model_test).values_list('pk', flat=True)) == pks
+        assert ModelRelatedObject.objects.get(pk=self.other.pk).order == 1
+
+    def test_reorder_runs_do_after_update_once(self):
+        ModelRelatedObject.reorder([obj.pk for obj in reversed(self.objs)])
+
+        assert ModelTest.objects.filter(title='update', num=100).count() == 1
+
+    @parameterized.expand([
+        ([1, 0, 2, 3],),
+        ([1, 0, 2, 3, 3],),
+        ([0, 1, 2, 3, 4, 5],),
+        ([],),
+    ])
+    def test_cant_reorder_without_all_the_objects_in_respect(self, indexes):
+        objs = [*self.objs, self.other]
+
+        with self.assertRaises(ValidationError):
+            ModelRelatedObject.reorder([objs[index].pk for index in indexes])
+
+        assert [obj.pk for obj in ModelRelatedObject.objects.filter(model_test=self.model_test)] == \
+               [obj.pk for obj in self.objs]
+
+    def test_reorder_sparse_ordered_model(self):
+        objs = [ModelSparseOrdered.objects.create(title=str(index), model_test=self.model_test) for index in range(3)]
+
+        ModelSparseOrdered.reorder([objs[2].pk, objs[0].pk, objs[1].pk])
+
+        assert [(obj.title, obj.order) for obj in ModelSparseOrdered.objects.filter(model_test=self.model_test)] == \
+               [('2', 1), ('0', 2), ('1', 3)]
+
+
+class TestBulkCreateOrdered(TestCase):
+    def setUp(self):
+        self.model_tests = [ModelTest.objects.create(title=str(index)) for index in range(3)]
+        create_model_in_batch(2, title='title', model_test=self.model_tests[0])
+        create_model_in_batch(1, title='title', model_test=self.model_tests[1])
+
+    def test_bulk_create_ordered(self):
+        objs = [
+            ModelRelatedObject(title=str(index), model_test=self.model_tests[index % 3]) for index in range(9)
+        ]
+
+        with CaptureQueriesContext(connection) as context:
+            ModelRelatedObject.objects.bulk_create_ordered(objs, batch_size=4)
+
+        selects = [query['sql'] for query in context.captured_queries if query['sql'].startswith('SELECT')]
+        inserts = [query['sql'] for query in context.captured_queries if 'INSERT INTO "core_modelrelatedobject"'
+                   in query['sql']]
+        assert len(selects) == 1
+        assert len(inserts) == 3
+        for model_test, orders in zip(self.model_tests, ([3, 4, 5], [2, 3, 4], [1, 2, 3])):
+            assert [obj.order for obj in objs if obj.model_test == model_test] == orders
+            queryset = ModelRelatedObject.objects.filter(model_test=model_test)
+            assert list(queryset.values_list('order', flat=True)) == list(range(1, orders[-1] + 1))
+
+    def test_bulk_create_ordered_runs_create_hooks(self):
+        ModelRelatedObject.objects.bulk_create_ordered(
+            [ModelRelatedObject(title='title', model_test=self.model_tests[2]) for _ in range(4)]
+        )
+
+        assert ModelTest.objects.filter(title='create', num=99).count() == 7
+
+    def test_bulk_create_sparse_ordered(self):
+        ModelSparseOrdered.objects.create(title='first', model_test=self.model_tests[0])
+        objs = [ModelSparseOrdered(title=str(index), model_test=self.model_tests[index % 2]) for index in range(4)]
+
+        ModelSparseOrdered.objects.bulk_create_ordered(objs)
+
+        assert [obj.order for obj in objs] == [2, 1, 3, 2]
+        for model_test, titles in zip(self.model_tests, (['first', '0', '2'], ['1', '3'])):
+            queryset = ModelSparseOrdered.objects.filter(model_test=model_test)
+            assert [(obj.title, obj.order) for obj in queryset] == list(zip(titles, range(1, len(titles) + 1)))
+
+
 def create_model_in_batch(batch, **kwargs):
     return [ModelRelatedObject.objects.create(**kwargs) for _ in range(batch)]
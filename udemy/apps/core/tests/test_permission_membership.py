@@ -0,0 +1,115 @@
+from unittest.mock import patch
+
+from django.test import TestCase, RequestFactory, override_settings
+
+from rest_framework.request import Request
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from tests.factories.course import CourseFactory
+from tests.factories.lesson import LessonFactory
+from tests.factories.user import UserFactory
+from udemy.apps.core.permissions import MEMBERSHIP_CLAIM, IsEnrolled, IsInstructor
+from udemy.apps.course.models import CourseRelation
+from udemy.apps.user.models import User
+
+factory = RequestFactory()
+
+
+class TestCourseMembership(TestCase):
+    def setUp(self):
+        self.user = UserFactory()
+        self.course = CourseFactory()
+        self.other_course = CourseFactory()
+        self.request = factory.get('/')
+        self.request.user = self.user
+
+    def test_memberships_are_loaded_once_per_request(self):
+        CourseRelation.objects.create(creator=self.user, course=self.course)
+        self.other_course.instructors.add(self.user)
+
+        with self.assertNumQueries(1):
+            assert IsEnrolled().has_object_permission(self.request, None, self.course)
+            assert IsEnrolled().has_object_permission(self.request, None, self.other_course)
+            assert IsInstructor().has_object_permission(self.request, None, self.other_course)
+            assert not IsInstructor().has_object_permission(self.request, None, self.course)
+
+    def test_memberships_of_related_objects(self):
+        lesson = LessonFactory(course=self.course)
+        self.course.instructors.add(self.user)
+
+        assert IsInstructor().has_object_permission(self.request, None, lesson)
+        assert IsEnrolled().has_object_permission(self.request, None, lesson)
+
+    def test_memberships_are_cleared_when_they_change_in_the_request(self):
+        with patch('udemy.apps.course.signals.get_current_request', return_value=self.request):
+            assert not IsEnrolled().has_object_permission(self.request, None, self.course)
+
+            CourseRelation.objects.create(creator=self.user, course=self.course)
+            assert IsEnrolled().has_object_permission(self.request, None, self.course)
+
+            self.course.instructors.add(self.user)
+            assert IsInstructor().has_object_permission(self.request, None, self.course)
+
+
+@override_settings(COURSE_MEMBERSHIP_CLAIMS=True)
+class TestCourseMembershipClaims(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = UserFactory()
+        self.user.set_password('password')
+        self.user.save()
+        self.course = CourseFactory()
+        self.other_course = CourseFactory()
+        CourseRelation.objects.create(creator=self.user, course=self.course)
+        self.other_course.instructors.add(self.user)
+
+    def get_access_token(self):
+        response = self.client.post(reverse('token_obtain_pair'), {'email': self.user.email, 'password': 'password'})
+        return AccessToken(response.data['access'])
+
+    def get_request(self, token):
+        self.user.refresh_from_db()
+        request = Request(factory.get('/'))
+        request.user, request.auth = self.user, token
+        return request
+
+    def test_access_token_has_the_memberships(self):
+        token = self.get_access_token()
+
+        assert token[MEMBERSHIP_CLAIM] == {
+            'v': User.objects.get(id=self.user.id).membership_version,
+            'e': [self.course.id],
+            'i': [self.other_course.id],
+        }
+
+    def test_refreshed_access_token_has_the_memberships(self):
+        response = self.client.post(reverse('token_obtain_pair'), {'email': self.user.email, 'password': 'password'})
+        self.course.instructors.add(self.user)
+
+        response = self.client.post(reverse('token_refresh'), {'refresh': response.data['refresh']})
+
+        assert AccessToken(response.data['access'])[MEMBERSHIP_CLAIM]['i'] == [self.course.id, self.other_course.id]
+
+    def test_permissions_read_the_claim_without_queries(self):
+        request = self.get_request(self.get_access_token())
+
+        with self.assertNumQueries(0):
+            assert IsEnrolled().has_object_permission(request, None, self.course)
+            assert IsInstructor().has_object_permission(request, None, self.other_course)
+            assert not IsInstructor().has_object_permission(request, None, self.course)
+
+    def test_outdated_claim_is_not_used(self):
+        token = self.get_access_token()
+        CourseRelation.objects.filter(creator=self.user).delete()
+        request = self.get_request(token)
+
+        with self.assertNumQueries(1):
+            assert not IsEnrolled().has_object_permission(request, None, self.course)
+
+    @override_settings(COURSE_MEMBERSHIP_CLAIMS_MAX_COURSES=1)
+    def test_users_with_many_courses_have_no_claim(self):
+        token = self.get_access_token()
+
+        assert MEMBERSHIP_CLAIM not in token
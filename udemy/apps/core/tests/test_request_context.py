@@ -0,0 +1,64 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.http import JsonResponse
+from django.test import TestCase, RequestFactory, override_settings
+from django.urls import path
+
+from udemy.apps.core.middleware import get_current_request, get_current_user, request_context
+from udemy.apps.message.models import Message
+from tests.factories.course import CourseFactory
+from tests.factories.user import UserFactory
+
+
+def current_request_view(request):
+    return JsonResponse({'is_current': get_current_request() is request})
+
+
+async def async_current_request_view(request):
+    return JsonResponse({'is_current': get_current_request() is request})
+
+
+urlpatterns = [
+    path('current/', current_request_view, name='current'),
+    path('async-current/', async_current_request_view, name='async-current'),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class TestRequestContext(TestCase):
+    def test_middleware_sets_current_request(self):
+        response = self.client.get('/current/')
+
+        assert response.json() == {'is_current': True}
+        assert get_current_request() is None
+
+    def test_middleware_sets_current_request_of_async_view(self):
+        response = self.client.get('/async-current/')
+
+        assert response.json() == {'is_current': True}
+        assert get_current_request() is None
+
+    def test_request_context_restores_previous_request(self):
+        request, other = RequestFactory().get('/'), RequestFactory().get('/')
+
+        with request_context(request):
+            with request_context(other):
+                assert get_current_request() is other
+            assert get_current_request() is request
+
+        assert get_current_request() is None
+
+    def test_request_context_is_not_shared_with_other_threads(self):
+        with request_context(RequestFactory().get('/')):
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                assert executor.submit(get_current_request).result() is None
+
+    def test_request_context_user_override(self):
+        user = UserFactory()
+
+        with request_context(user=user):
+            assert get_current_user() == user
+            message = Message.objects.create(course=CourseFactory(), title='title', content='content')
+
+        assert message.creator == user
+        assert get_current_user() is None
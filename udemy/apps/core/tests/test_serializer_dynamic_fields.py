@@ -1,6 +1,9 @@
+from unittest.mock import patch
+
 from django.test import TestCase
 from rest_framework import serializers
 
+from udemy.apps.core.mixins.serializer import SerializerFieldsCache, serializer_fields_cache
 from udemy.apps.core.models import ModelTest
 from udemy.apps.core.serializer import ModelSerializer
 
@@ -49,3 +52,38 @@ class SerializerDynamicFieldsTests(TestCase):
         data = serializer.to_representation(model_test)
 
         assert data == {'id': model_test.id, 'title': model_test.title, 'custom_field': f'custom field {model_test.id}'}
+
+
+class SerializerFieldsCacheTests(TestCase):
+    def setUp(self):
+        serializer_fields_cache.clear()
+
+    def test_fields_are_built_once_per_requested_fields(self):
+        model_test = ModelTest.objects.create(title='test')
+
+        with patch('rest_framework.serializers.ModelSerializer.get_fields', autospec=True,
+                   side_effect=serializers.ModelSerializer.get_fields) as get_fields:
+            first = ModelTestSerializer(fields=('id', 'title'))
+            second = ModelTestSerializer(fields=('title', 'id'))
+            data = second.to_representation(model_test)
+
+        assert get_fields.call_count == 1
+        assert data == {'id': model_test.id, 'title': model_test.title}
+        assert first.fields['title'] is not second.fields['title']
+        assert second.fields['title'].parent is second
+
+    def test_only_requested_fields_are_built(self):
+        serializer = ModelTestSerializer(fields=('@default',))
+
+        assert list(serializer.get_fields()) == ['id', 'title']
+
+    def test_cache_is_bounded(self):
+        cache = SerializerFieldsCache(maxsize=2)
+        cache.set('a', {})
+        cache.set('b', {})
+        cache.get('a')
+        cache.set('c', {})
+
+        assert cache.get('b') is None
+        assert cache.get('a') == {}
+        assert cache.get('c') == {}
@@ -0,0 +1,69 @@
+from unittest.mock import patch
+
+from django.test import TestCase
+from rest_framework import serializers
+
+from udemy.apps.core.models import ModelTest
+from udemy.apps.core.serializer import ModelSerializer
+
+
+class ModelTestSerializer(ModelSerializer):
+    class Meta:
+        model = ModelTest
+        fields = ('id', 'title', 'num')
+
+
+class ModelTestMethodSerializer(ModelSerializer):
+    method_field = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ModelTest
+        fields = ('id', 'title', 'method_field')
+
+    def get_method_field(self, instance):
+        return instance.title
+
+
+class SerializerValuesTests(TestCase):
+    def setUp(self):
+        self.model_test = ModelTest.objects.create(title='test', num=5)
+
+    def test_columns_are_values_fields(self):
+        serializer = ModelTestSerializer(fields=('id', 'title', 'num'))
+
+        assert serializer.values_fields == [('id', 'id', None), ('title', 'title', None), ('num', 'num', None)]
+
+    def test_method_fields_are_not_values_fields(self):
+        serializer = ModelTestMethodSerializer(fields=('id', 'title', 'method_field'))
+
+        assert serializer.values_fields is None
+
+    def test_values_representation_of_instance(self):
+        serializer = ModelTestSerializer(fields=('id', 'title', 'num'))
+
+        assert serializer.to_values_representation(self.model_test) == serializer.to_representation(self.model_test)
+
+    def test_list_of_queryset_is_represented_from_values(self):
+        queryset = ModelTest.objects.filter(id=self.model_test.id)
+        serializer = ModelTestSerializer(queryset, many=True, fields=('id', 'title', 'num'))
+
+        with patch.object(ModelTest, 'from_db') as from_db:
+            data = serializer.data
+
+        from_db.assert_not_called()
+        assert data == [{
+            'id': self.model_test.id,
+            'title': self.model_test.title,
+            'num': self.model_test.num
+        }]
+
+    def test_list_of_method_fields_is_represented_from_instances(self):
+        serializer = ModelTestMethodSerializer(
+            ModelTest.objects.filter(id=self.model_test.id), many=True, fields=('id', 'title', 'method_field')
+        )
+
+        assert serializer.data == [{
+            'id': self.model_test.id,
+            'title': self.model_test.title,
+            'method_field': self.model_test.title
+        }]
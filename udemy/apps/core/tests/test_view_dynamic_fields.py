@@ -1,13 +1,15 @@
+from django.db import connection
 from django.urls import path
 from django.test import TestCase, override_settings, RequestFactory
+from django.test.utils import CaptureQueriesContext
 
 from rest_framework import serializers
 from rest_framework.reverse import reverse
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.test import APIClient
 
-from udemy.apps.core.mixins.view import DynamicFieldViewMixin
-from udemy.apps.core.models import ModelTest
+from udemy.apps.core.mixins.view import DynamicFieldViewMixin, RelatedObjectViewMixin
+from udemy.apps.core.models import ModelTest, ModelRelatedObject
 from udemy.apps.core.serializer import ModelSerializer
 
 
@@ -30,8 +32,46 @@ class ModelTestViewSet(DynamicFieldViewMixin, ModelViewSet):
         model = ModelTest
 
 
+class ProjectedModelTestSerializer(ModelSerializer):
+    class Meta:
+        model = ModelTest
+        fields = ('id', 'title', 'num')
+        related_objects = {
+            'model_related': {
+                'serializer': f'{__name__}.ProjectedRelatedObjectSerializer',
+                'many': True
+            }
+        }
+
+
+class ProjectedRelatedObjectSerializer(ModelSerializer):
+    class Meta:
+        model = ModelRelatedObject
+        fields = ('id', 'title', 'order')
+        related_objects = {
+            'model_test': {
+                'serializer': ProjectedModelTestSerializer
+            }
+        }
+
+
+class ProjectedModelTestViewSet(RelatedObjectViewMixin, DynamicFieldViewMixin, ModelViewSet):
+    queryset = ModelTest.objects.all()
+    serializer_class = ProjectedModelTestSerializer
+
+
+class ProjectedRelatedObjectViewSet(RelatedObjectViewMixin, DynamicFieldViewMixin, ModelViewSet):
+    queryset = ModelRelatedObject.objects.all()
+    serializer_class = ProjectedRelatedObjectSerializer
+
+
 urlpatterns = [
-    path('test/<int:pk>/', ModelTestViewSet.as_view({'get': 'retrieve'}), name='test-retrieve')
+    path('test/<int:pk>/', ModelTestViewSet.as_view({'get': 'retrieve'}), name='test-retrieve'),
+    path('projected/<int:pk>/', ProjectedModelTestViewSet.as_view({'get': 'retrieve'}), name='projected-retrieve'),
+    path(
+        'projected-related/<int:pk>/', ProjectedRelatedObjectViewSet.as_view({'get': 'retrieve'}),
+        name='projected-related-retrieve'
+    ),
 ]
 
 factory = RequestFactory()
@@ -50,3 +90,41 @@ class TestDynamicFieldsView(TestCase):
         response = self.client.get(f'{url}?fields=custom_field')
 
         assert response.data == {'custom_field': f'custom field {model_test.id}'}
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class TestOnlyFieldsView(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.model_test = ModelTest.objects.create(title='test', num=5)
+        self.related_object = ModelRelatedObject.objects.create(title='related', model_test=self.model_test)
+
+    def test_only_requested_columns_are_selected(self):
+        url = reverse('projected-retrieve', kwargs={'pk': self.model_test.id})
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(f'{url}?fields=title')
+
+        assert response.data == {'title': self.model_test.title}
+        assert '"num"' not in context.captured_queries[0]['sql']
+
+    def test_only_requested_columns_of_prefetched_objects_are_selected(self):
+        url = reverse('projected-retrieve', kwargs={'pk': self.model_test.id})
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(f'{url}?fields=id,model_related&fields[model_related]=title')
+
+        related_query = context.captured_queries[-1]['sql']
+
+        assert len(context.captured_queries) == 2
+        assert '"order"' not in related_query
+        assert response.data['model_related'] == [{'title': self.related_object.title}]
+
+    def test_select_related_objects_are_not_deferred(self):
+        url = reverse('projected-related-retrieve', kwargs={'pk': self.related_object.id})
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(f'{url}?fields=title&fields[model_test]=title')
+
+        assert len(context.captured_queries) == 1
+        assert response.data == {'title': self.related_object.title}
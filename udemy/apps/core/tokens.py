@@ -0,0 +1,49 @@
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from udemy.apps.core.permissions import MEMBERSHIP_CLAIM, CourseMembership
+
+
+class CourseMembershipRefreshToken(RefreshToken):
+    """
+    Refresh token whose access tokens carry the user's course memberships in the `courses` claim when
+    `COURSE_MEMBERSHIP_CLAIMS` is enabled.
+    """
+    user = None
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token.user = user
+        return token
+
+    def get_user(self):
+        if self.user is None:
+            self.user = get_user_model().objects.filter(**{
+                api_settings.USER_ID_FIELD: self[api_settings.USER_ID_CLAIM]
+            }).first()
+        return self.user
+
+    @property
+    def access_token(self):
+        access = super().access_token
+
+        if settings.COURSE_MEMBERSHIP_CLAIMS:
+            user = self.get_user()
+            claim = CourseMembership(user).get_claim() if user is not None else None
+            if claim is not None:
+                access[MEMBERSHIP_CLAIM] = claim
+
+        return access
+
+
+class CourseMembershipTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = CourseMembershipRefreshToken
+
+
+class CourseMembershipTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = CourseMembershipRefreshToken
@@ -1,20 +1,36 @@
 from django.db import models
+from django.db.models.functions import Coalesce, NullIf
 
 from udemy.apps.core.annotations import AnnotationBase
 
 
+def _stats(field_name, output_field):
+    return Coalesce(models.F(f'stats__{field_name}'), 0, output_field=output_field)
+
+
 class CourseAnnotations(AnnotationBase):
+    """
+    Course annotations, the counters maintained in `CourseStats` are read from the stats row when `read_from_stats`
+    is set instead of aggregating the related tables.
+    """
+    read_from_stats = True
 
     def num_modules(self):
         return models.Count('modules', distinct=True)
 
     def num_lessons(self):
+        if self.read_from_stats:
+            return _stats('num_lessons', models.IntegerField())
         return models.Count('lessons', distinct=True)
 
     def num_contents(self):
+        if self.read_from_stats:
+            return _stats('num_contents', models.IntegerField())
         return models.Count('contents', distinct=True)
 
     def num_subscribers(self):
+        if self.read_from_stats:
+            return _stats('num_subscribers', models.IntegerField())
         return models.Count('students', distinct=True)
 
     def num_questions(self):
@@ -24,6 +40,8 @@ class CourseAnnotations(AnnotationBase):
         return models.Count('quizzes', distinct=True)
 
     def num_ratings(self):
+        if self.read_from_stats:
+            return _stats('num_ratings', models.IntegerField())
         return models.Count('ratings', distinct=True)
 
     def num_contents_info(self):
@@ -33,7 +51,18 @@ class CourseAnnotations(AnnotationBase):
         }
 
     def rating_avg(self):
+        if self.read_from_stats:
+            return Coalesce(
+                models.ExpressionWrapper(
+                    models.F('stats__rating_sum') / NullIf(models.F('stats__num_ratings'), 0),
+                    output_field=models.FloatField()
+                ),
+                0,
+                output_field=models.FloatField()
+            )
         return models.Avg('ratings__rating', default=0)
 
     def content_video_minute_duration(self):
+        if self.read_from_stats:
+            return _stats('video_duration', models.IntegerField())
         return models.Sum('lessons__video_duration', output_field=models.IntegerField(), default=0)
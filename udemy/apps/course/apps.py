@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class CourseConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'udemy.apps.course'
+
+    def ready(self):
+        from udemy.apps.course import signals  # noqa: F401
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from udemy.apps.course.models import Course, CourseStats
+
+STATS_FIELDS = ('num_subscribers', 'num_ratings', 'rating_sum', 'num_lessons', 'num_contents', 'video_duration')
+
+
+class Command(BaseCommand):
+    help = 'Recount the course statistics in batches and fix the rows that drifted from the related tables.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        course_ids = list(Course.objects.order_by('id').values_list('id', flat=True))
+
+        fixed = 0
+        for start in range(0, len(course_ids), batch_size):
+            fixed += self.reconcile_batch(course_ids[start:start + batch_size])
+
+        self.stdout.write(self.style.SUCCESS(f'{fixed} course stats reconciled.'))
+
+    @transaction.atomic
+    def reconcile_batch(self, course_ids):
+        courses = Course.objects.filter(id__in=course_ids).annotate(**{
+            f'recount_{field}': annotation
+            for field, annotation in CourseStats.get_recount_annotations().items()
+        })
+        stats = {
+            stat.course_id: stat
+            for stat in CourseStats.objects.select_for_update().filter(course_id__in=course_ids)
+        }
+
+        to_create, to_update = [], []
+        for course in courses:
+            values = {field: getattr(course, f'recount_{field}') or 0 for field in STATS_FIELDS}
+            stat = stats.get(course.id)
+            if stat is None:
+                to_create.append(CourseStats(course=course, **values))
+            elif any(getattr(stat, field) != value for field, value in values.items()):
+                for field, value in values.items():
+                    setattr(stat, field, value)
+                to_update.append(stat)
+
+        CourseStats.objects.bulk_create(to_create)
+        CourseStats.objects.bulk_update(to_update, STATS_FIELDS)
+
+        return len(to_create) + len(to_update)
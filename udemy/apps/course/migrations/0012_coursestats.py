@@ -0,0 +1,63 @@
+# Generated by Django 4.1.2 on 2026-10-17 12:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def create_course_stats(apps, schema_editor):
+    Course = apps.get_model('course', 'Course')
+    CourseStats = apps.get_model('course', 'CourseStats')
+
+    def aggregate(expression):
+        return models.Subquery(
+            Course.objects.filter(pk=models.OuterRef('pk')).order_by().annotate(value=expression).values('value')
+        )
+
+    courses = Course.objects.annotate(
+        stats_num_subscribers=aggregate(models.Count('students', distinct=True)),
+        stats_num_ratings=aggregate(models.Count('ratings', distinct=True)),
+        stats_rating_sum=aggregate(models.Sum('ratings__rating', default=0)),
+        stats_num_lessons=aggregate(models.Count('lessons', distinct=True)),
+        stats_num_contents=aggregate(models.Count('contents', distinct=True)),
+        stats_video_duration=aggregate(models.Sum('lessons__video_duration', default=0)),
+    )
+
+    CourseStats.objects.bulk_create([
+        CourseStats(
+            course_id=course.id,
+            num_subscribers=course.stats_num_subscribers,
+            num_ratings=course.stats_num_ratings,
+            rating_sum=course.stats_rating_sum,
+            num_lessons=course.stats_num_lessons,
+            num_contents=course.stats_num_contents,
+            video_duration=course.stats_video_duration,
+        )
+        for course in courses.iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course', '0011_alter_course_options'),
+        ('rating', '0005_remove_rating_unique rating_rating_unique rating'),
+        ('lesson', '0005_lessonrelation_unique lesson relation'),
+        ('content', '0004_alter_content_options'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CourseStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('num_subscribers', models.PositiveIntegerField(default=0)),
+                ('num_ratings', models.PositiveIntegerField(default=0)),
+                ('rating_sum', models.FloatField(default=0)),
+                ('num_lessons', models.PositiveIntegerField(default=0)),
+                ('num_contents', models.PositiveIntegerField(default=0)),
+                ('video_duration', models.FloatField(default=0)),
+                ('course', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='course.course')),
+            ],
+        ),
+        migrations.RunPython(create_course_stats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.1.2 on 2026-10-17 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('course', '0012_coursestats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='coursestats',
+            name='version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
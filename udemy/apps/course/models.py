@@ -1,7 +1,9 @@
 from django.db import models
+from django.db.models.functions import Greatest
 from django.utils.translation import gettext_lazy as _
 
 from udemy.apps.category.models import Category
+from udemy.apps.core.cache import course_tag, purge_tags
 from udemy.apps.core.models import TimeStampedBase, CreatorBase
 from udemy.apps.course.annotations import CourseAnnotations
 from udemy.apps.user.models import User
@@ -39,6 +41,32 @@ class Course(TimeStampedBase):
     class Meta:
         ordering = ['id']
 
+    @classmethod
+    def get_children_models(cls):
+        """Return the models that belong to a course by their `course` foreign key."""
+        return [
+            relation.related_model for relation in cls._meta.related_objects
+            if relation.field.many_to_one and relation.field.name == 'course'
+        ]
+
+    @classmethod
+    def get_validators(cls, **filters):
+        """
+        Return the validators of the course that matches the filters, or None: `last_modified`, the last `modified` of
+        the course and of its timestamped children, and `version`, the version of the course stats, that also changes
+        with the children without timestamps and with deletes.
+        """
+        children_modified = [
+            models.Subquery(model.objects.filter(course=models.OuterRef('pk')).order_by('-modified').values(
+                'modified'
+            )[:1])
+            for model in cls.get_children_models() if issubclass(model, TimeStampedBase)
+        ]
+        return cls.objects.filter(**filters).values('id').annotate(
+            last_modified=Greatest('modified', *children_modified),
+            version=models.F('stats__version'),
+        ).first()
+
 
 class CourseRelation(CreatorBase, TimeStampedBase):
     course = models.ForeignKey(Course, on_delete=models.CASCADE)
@@ -46,3 +74,49 @@ class CourseRelation(CreatorBase, TimeStampedBase):
     class Meta:
         constraints = [
             models.UniqueConstraint(fields=('creator', 'course'), name='unique course relation')]
+
+
+class CourseStats(models.Model):
+    course = models.OneToOneField(
+        Course,
+        related_name='stats',
+        on_delete=models.CASCADE,
+    )
+    num_subscribers = models.PositiveIntegerField(default=0)
+    num_ratings = models.PositiveIntegerField(default=0)
+    rating_sum = models.FloatField(default=0)
+    num_lessons = models.PositiveIntegerField(default=0)
+    num_contents = models.PositiveIntegerField(default=0)
+    video_duration = models.FloatField(default=0)
+    version = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f'{self.course} stats'
+
+    @classmethod
+    def increment(cls, course_id, **deltas):
+        """Increment the stats of the course by the deltas, any change outdates the course, see `outdate`."""
+        cls.objects.filter(course_id=course_id).update(version=models.F('version') + 1, **{
+            field: models.F(field) + delta
+            for field, delta in deltas.items()
+        })
+        purge_tags(course_tag(course_id))
+
+    @classmethod
+    def outdate(cls, **filters):
+        """Outdate the version and the cached responses of the courses of the stats that match the filters."""
+        course_ids = list(cls.objects.filter(**filters).values_list('course_id', flat=True))
+        cls.objects.filter(course_id__in=course_ids).update(version=models.F('version') + 1)
+        purge_tags(*[course_tag(course_id) for course_id in course_ids])
+
+    @staticmethod
+    def get_recount_annotations():
+        annotations = {
+            'num_subscribers': models.Count('students', distinct=True),
+            'num_ratings': models.Count('ratings', distinct=True),
+            'rating_sum': models.Sum('ratings__rating', default=0),
+            'num_lessons': models.Count('lessons', distinct=True),
+            'num_contents': models.Count('contents', distinct=True),
+            'video_duration': models.Sum('lessons__video_duration', default=0),
+        }
+        return Course.annotation_class.compile_annotations(Course, annotations)
@@ -40,6 +40,7 @@ class CourseSerializer(ModelSerializer):
                 'serializer': 'udemy.apps.lesson.serializer.LessonSerializer',
                 'permissions': [IsEnrolled],
                 'many': True,
+                'counter': 'stats.num_lessons',
             },
             'modules': {
                 'serializer': 'udemy.apps.module.serializer.ModuleSerializer',
@@ -50,11 +51,13 @@ class CourseSerializer(ModelSerializer):
                 'serializer': 'udemy.apps.content.serializer.ContentSerializer',
                 'permissions': [IsEnrolled],
                 'many': True,
+                'counter': 'stats.num_contents',
             },
             'ratings': {
                 'serializer': 'udemy.apps.rating.serializer.RatingSerializer',
                 'permissions': [IsEnrolled],
                 'many': True,
+                'counter': 'stats.num_ratings',
             },
             'warning_messages': {
                 'serializer': 'udemy.apps.message.serializer.MessageSerializer',
@@ -79,6 +82,7 @@ class CourseSerializer(ModelSerializer):
         }
         min_fields = ('id', 'title', 'url')
         default_fields = (*min_fields, 'price', 'is_paid')
+        field_sources = {'url': ('slug',)}
 
     def get_url(self, instance):
         return f'https://udemy.com/course/{instance.slug}'
@@ -86,7 +90,7 @@ class CourseSerializer(ModelSerializer):
     def get_related_objects(self):
         related_objects = super().get_related_objects()
         user = getattr(self.context.get('request'), 'user', None)
-        if user:
+        if user and user.is_authenticated:
             related_objects['notes']['filter'] = {
                 'creator': user
             }
@@ -0,0 +1,248 @@
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete, pre_save, m2m_changed
+from django.dispatch import receiver
+
+from udemy.apps.category.models import Category
+from udemy.apps.core.cache import course_tag, model_tag, purge_tags
+from udemy.apps.core.middleware import get_current_request
+from udemy.apps.core.models import OrderedModel, TimeStampedBase
+from udemy.apps.core.signals import post_bulk_create, post_reorder
+from udemy.apps.core.permissions import clear_course_membership, get_course_id
+from udemy.apps.course.models import Course, CourseStats
+from udemy.apps.user.models import User
+
+
+@receiver(post_save, sender=Course)
+def create_course_stats(sender, instance, created, **kwargs):
+    if created:
+        CourseStats.objects.create(course=instance)
+
+
+@receiver(post_save, sender='course.CourseRelation')
+def increment_course_subscribers(sender, instance, created, **kwargs):
+    if created:
+        CourseStats.increment(instance.course_id, num_subscribers=1)
+
+
+@receiver(post_delete, sender='course.CourseRelation')
+def decrement_course_subscribers(sender, instance, **kwargs):
+    CourseStats.increment(instance.course_id, num_subscribers=-1)
+
+
+@receiver(m2m_changed, sender=Course.students.through)
+def increment_added_course_subscribers(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    `students.add()` creates the relations with `bulk_create`, that sends no `post_save`. Removals and clears delete the
+    relations one by one, so they are counted by `decrement_course_subscribers`.
+    """
+    if action != 'post_add' or not pk_set:
+        return
+
+    if reverse:
+        for course_id in pk_set:
+            CourseStats.increment(course_id, num_subscribers=1)
+    else:
+        CourseStats.increment(instance.id, num_subscribers=len(pk_set))
+
+
+def _change_course_membership(user_ids):
+    """Outdate the course membership claims of the users and the memberships loaded in the current request."""
+    User.objects.filter(id__in=list(user_ids)).update(membership_version=F('membership_version') + 1)
+    clear_course_membership(get_current_request())
+
+
+@receiver(post_save, sender='course.CourseRelation')
+def change_enrolled_membership(sender, instance, created, **kwargs):
+    if created:
+        _change_course_membership([instance.creator_id])
+
+
+@receiver(post_delete, sender='course.CourseRelation')
+def remove_enrolled_membership(sender, instance, **kwargs):
+    _change_course_membership([instance.creator_id])
+
+
+@receiver(m2m_changed, sender=Course.students.through)
+@receiver(m2m_changed, sender=Course.instructors.through)
+def change_course_membership(sender, instance, action, reverse, pk_set, **kwargs):
+    if action in ('post_add', 'post_remove') and pk_set:
+        _change_course_membership([instance.pk] if reverse else pk_set)
+    elif action == 'pre_clear':
+        members = 'students' if sender is Course.students.through else 'instructors'
+        _change_course_membership(
+            [instance.pk] if reverse else getattr(instance, members).values_list('id', flat=True)
+        )
+
+
+def _get_saved_values(instance, *field_names):
+    """Return the values of the fields currently stored in the database, empty for new objects."""
+    if instance._state.adding:
+        return {}
+    return instance.__class__.objects.filter(pk=instance.pk).values(*field_names).first() or {}
+
+
+def _get_saved_course_id(instance):
+    """Return the course the saved object is moved from, or None when it stays in its course."""
+    course_id = instance._saved_values.get('course_id')
+    return course_id if course_id is not None and course_id != instance.course_id else None
+
+
+@receiver(pre_save, sender='rating.Rating')
+def store_saved_rating(sender, instance, **kwargs):
+    instance._saved_values = _get_saved_values(instance, 'course_id', 'rating')
+
+
+@receiver(post_save, sender='rating.Rating')
+@transaction.atomic
+def increment_course_ratings(sender, instance, created, **kwargs):
+    saved_rating = instance._saved_values.get('rating')
+    saved_course_id = _get_saved_course_id(instance)
+    if created:
+        CourseStats.increment(instance.course_id, num_ratings=1, rating_sum=instance.rating)
+    elif saved_course_id is not None:
+        CourseStats.increment(saved_course_id, num_ratings=-1, rating_sum=-saved_rating)
+        CourseStats.increment(instance.course_id, num_ratings=1, rating_sum=instance.rating)
+    elif saved_rating is not None and saved_rating != instance.rating:
+        CourseStats.increment(instance.course_id, rating_sum=instance.rating - saved_rating)
+
+
+@receiver(post_delete, sender='rating.Rating')
+def decrement_course_ratings(sender, instance, **kwargs):
+    CourseStats.increment(instance.course_id, num_ratings=-1, rating_sum=-instance.rating)
+
+
+@receiver(pre_save, sender='lesson.Lesson')
+def store_saved_video_duration(sender, instance, **kwargs):
+    instance._saved_values = _get_saved_values(instance, 'course_id', 'video_duration')
+
+
+@receiver(post_save, sender='lesson.Lesson')
+@transaction.atomic
+def increment_course_lessons(sender, instance, created, **kwargs):
+    video_duration = instance.video_duration or 0
+    saved_video_duration = instance._saved_values.get('video_duration') or 0
+    saved_course_id = _get_saved_course_id(instance)
+    if created:
+        CourseStats.increment(instance.course_id, num_lessons=1, video_duration=video_duration)
+    elif saved_course_id is not None:
+        CourseStats.increment(saved_course_id, num_lessons=-1, video_duration=-saved_video_duration)
+        CourseStats.increment(instance.course_id, num_lessons=1, video_duration=video_duration)
+    elif video_duration != saved_video_duration:
+        CourseStats.increment(instance.course_id, video_duration=video_duration - saved_video_duration)
+
+
+@receiver(post_delete, sender='lesson.Lesson')
+def decrement_course_lessons(sender, instance, **kwargs):
+    CourseStats.increment(instance.course_id, num_lessons=-1, video_duration=-(instance.video_duration or 0))
+
+
+@receiver(post_bulk_create, sender='lesson.Lesson')
+def increment_courses_lessons(sender, objs, **kwargs):
+    courses = defaultdict(list)
+    for lesson in objs:
+        courses[lesson.course_id].append(lesson.video_duration or 0)
+
+    for course_id, video_durations in courses.items():
+        CourseStats.increment(course_id, num_lessons=len(video_durations), video_duration=sum(video_durations))
+
+
+@receiver(pre_save, sender='content.Content')
+def store_saved_content_course(sender, instance, **kwargs):
+    instance._saved_values = _get_saved_values(instance, 'course_id')
+
+
+@receiver(post_save, sender='content.Content')
+@transaction.atomic
+def increment_course_contents(sender, instance, created, **kwargs):
+    saved_course_id = _get_saved_course_id(instance)
+    if created:
+        CourseStats.increment(instance.course_id, num_contents=1)
+    elif saved_course_id is not None:
+        CourseStats.increment(saved_course_id, num_contents=-1)
+        CourseStats.increment(instance.course_id, num_contents=1)
+
+
+@receiver(post_bulk_create, sender='content.Content')
+def increment_courses_contents(sender, objs, **kwargs):
+    courses = defaultdict(int)
+    for content in objs:
+        courses[content.course_id] += 1
+
+    for course_id, num_contents in courses.items():
+        CourseStats.increment(course_id, num_contents=num_contents)
+
+
+@receiver(post_delete, sender='content.Content')
+def decrement_course_contents(sender, instance, **kwargs):
+    CourseStats.increment(instance.course_id, num_contents=-1)
+
+
+def change_course_version(sender, instance, **kwargs):
+    CourseStats.increment(instance.course_id)
+
+
+def change_courses_versions(sender, objs, **kwargs):
+    CourseStats.outdate(course_id__in={get_course_id(instance) for instance in objs})
+
+
+def purge_course_responses(sender, instance, **kwargs):
+    purge_tags(course_tag(get_course_id(instance)), model_tag(sender))
+
+
+def purge_courses_responses(sender, objs, **kwargs):
+    purge_tags(*{course_tag(get_course_id(instance)) for instance in objs}, model_tag(sender))
+
+
+post_save.connect(purge_course_responses, sender=Course, dispatch_uid='save-course-responses')
+post_delete.connect(purge_course_responses, sender=Course, dispatch_uid='delete-course-responses')
+
+# The children with timestamps change the validators of the course by their `modified`, except when deleted.
+for model in Course.get_children_models():
+    post_delete.connect(change_course_version, sender=model, dispatch_uid=f'delete-{model._meta.label}-course-version')
+    if not issubclass(model, TimeStampedBase):
+        post_save.connect(change_course_version, sender=model, dispatch_uid=f'save-{model._meta.label}-course-version')
+        post_bulk_create.connect(
+            change_courses_versions, sender=model, dispatch_uid=f'bulk-create-{model._meta.label}-course-version'
+        )
+
+    post_save.connect(purge_course_responses, sender=model, dispatch_uid=f'save-{model._meta.label}-responses')
+    post_delete.connect(purge_course_responses, sender=model, dispatch_uid=f'delete-{model._meta.label}-responses')
+
+    # Reorders and ordered bulk creates write the children without saving them.
+    if issubclass(model, OrderedModel):
+        post_reorder.connect(
+            change_course_version, sender=model, dispatch_uid=f'reorder-{model._meta.label}-course-version'
+        )
+        post_reorder.connect(
+            purge_course_responses, sender=model, dispatch_uid=f'reorder-{model._meta.label}-responses'
+        )
+        post_bulk_create.connect(
+            purge_courses_responses, sender=model, dispatch_uid=f'bulk-create-{model._meta.label}-responses'
+        )
+
+
+@receiver(m2m_changed, sender=Course.instructors.through)
+@receiver(m2m_changed, sender=Course.categories.through)
+def change_courses_version(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+
+    if not reverse:
+        CourseStats.increment(instance.pk)
+    elif action == 'pre_clear':
+        relation = 'instructors' if sender is Course.instructors.through else 'categories'
+        CourseStats.outdate(**{f'course__{relation}': instance})
+    else:
+        CourseStats.outdate(course_id__in=pk_set)
+    purge_tags(model_tag(Course))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Category)
+def change_related_courses_version(sender, instance, created, **kwargs):
+    if not created:
+        relation = 'instructors' if sender is User else 'categories'
+        CourseStats.outdate(**{f'course__{relation}': instance})
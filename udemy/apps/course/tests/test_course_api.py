@@ -36,6 +36,18 @@ class TestCourseUnauthenticatedRequests(TestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data, serializer.data)
 
+    def test_course_list_of_columns_and_annotations(self):
+        course = CourseFactory()
+        fields = 'id,title,price,is_paid,created,num_lessons,num_contents_info'
+
+        response = self.client.get(f'{COURSE_LIST_URL}?fields={fields}')
+
+        course = Course.objects.annotate(**Course.annotation_class.get_annotations('*')).get(id=course.id)
+        serializer = CourseSerializer(course, fields=fields.split(','))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [serializer.data])
+
 
 class TestAuthenticatedRequests(TestCase):
     """Test authenticated API requests."""
@@ -0,0 +1,107 @@
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from tests.factories.course import CourseFactory
+from tests.factories.lesson import LessonFactory
+from tests.factories.user import UserFactory
+
+from udemy.apps.course.models import Course, CourseRelation
+from udemy.apps.course.views import CourseViewSet
+
+
+def course_detail_url(pk): return reverse('course-detail', kwargs={'pk': pk})
+
+
+def lesson_detail_url(pk): return reverse('lesson-detail', kwargs={'pk': pk})
+
+
+class TestCourseConditionalRequests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.course = CourseFactory()
+        self.url = course_detail_url(pk=self.course.id)
+
+    def revalidate(self, url=None, **params):
+        response = self.client.get(url or self.url, params)
+        return self.client.get(url or self.url, params, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def test_retrieve_has_validators(self):
+        response = self.client.get(self.url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.has_header('ETag')
+        assert response.has_header('Last-Modified')
+
+    def test_not_modified_before_building_queryset(self):
+        etag = self.client.get(self.url)['ETag']
+
+        with patch.object(CourseViewSet, 'get_queryset') as get_queryset:
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_304_NOT_MODIFIED
+        assert response['ETag'] == etag
+        get_queryset.assert_not_called()
+
+    def test_course_change_outdates_validators(self):
+        etag = self.client.get(self.url)['ETag']
+        self.course.title = 'changed'
+        self.course.save()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['title'] == 'changed'
+
+    def test_child_without_timestamps_outdates_validators(self):
+        etag = self.client.get(self.url)['ETag']
+        LessonFactory(course=self.course)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_instructors_change_outdates_validators(self):
+        etag = self.client.get(self.url)['ETag']
+        self.course.instructors.add(UserFactory())
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_validators_vary_by_fields(self):
+        etag = self.client.get(self.url)['ETag']
+
+        response = self.client.get(self.url, {'fields': 'id,title'}, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert self.revalidate(fields='id,title').status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_validators_vary_by_permission_scope(self):
+        user = UserFactory()
+        self.client.force_authenticate(user)
+        etag = self.client.get(self.url)['ETag']
+        CourseRelation.objects.create(course=self.course, creator=user)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        assert response.status_code == status.HTTP_200_OK
+
+    def test_lesson_not_modified(self):
+        user = UserFactory()
+        lesson = LessonFactory()
+        CourseRelation.objects.create(course=lesson.course, creator=user)
+        self.client.force_authenticate(user)
+
+        assert self.revalidate(lesson_detail_url(pk=lesson.id)).status_code == status.HTTP_304_NOT_MODIFIED
+
+    def test_get_validators(self):
+        validators = Course.get_validators(id=self.course.id)
+
+        assert validators['id'] == self.course.id
+        assert validators['last_modified'] == self.course.modified
+        assert Course.get_validators(id=0) is None
@@ -0,0 +1,116 @@
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from rest_framework import status
+from rest_framework.reverse import reverse
+from rest_framework.test import APIClient
+
+from tests.factories.course import CourseFactory
+from tests.factories.lesson import LessonFactory
+from tests.factories.note import NoteFactory
+from tests.factories.user import UserFactory
+
+from udemy.apps.course.models import Course, CourseRelation
+from udemy.apps.course.views import CourseViewSet
+
+COURSE_LIST_URL = reverse('course-list')
+
+
+def course_detail_url(pk): return reverse('course-detail', kwargs={'pk': pk})
+
+
+class TestCourseResponseCache(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.course = CourseFactory()
+        self.url = course_detail_url(pk=self.course.id)
+
+    def test_retrieve_is_cached(self):
+        self.client.get(self.url)
+
+        with patch.object(CourseViewSet, 'get_queryset') as get_queryset:
+            response = self.client.get(self.url)
+
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data['title'] == self.course.title
+        get_queryset.assert_not_called()
+
+    def test_retrieve_is_cached_by_fields(self):
+        self.client.get(self.url, {'fields': 'id,title'})
+        response = self.client.get(self.url, {'fields': 'title,id,url'})
+
+        assert set(response.data) == {'id', 'title', 'url'}
+
+    def test_course_save_purges_retrieve(self):
+        self.client.get(self.url)
+        self.course.title = 'changed'
+        self.course.save()
+
+        response = self.client.get(self.url)
+
+        assert response.data['title'] == 'changed'
+
+    def test_child_save_purges_retrieve(self):
+        self.client.get(self.url, {'fields': 'id,num_lessons'})
+        LessonFactory(course=self.course)
+
+        response = self.client.get(self.url, {'fields': 'id,num_lessons'})
+
+        assert response.data['num_lessons'] == 1
+
+    def test_retrieve_is_cached_by_permission_scope(self):
+        user = UserFactory()
+        self.client.get(self.url)
+        self.client.force_authenticate(user)
+        CourseRelation.objects.create(course=self.course, creator=user)
+        Course.objects.filter(id=self.course.id).update(title='changed')
+
+        response = self.client.get(self.url)
+
+        assert response.data['title'] == 'changed'
+
+    def test_retrieve_of_user_related_objects_is_cached_per_user(self):
+        user_a, user_b = UserFactory(), UserFactory()
+        CourseRelation.objects.create(course=self.course, creator=user_a)
+        CourseRelation.objects.create(course=self.course, creator=user_b)
+        note = NoteFactory(course=self.course, lesson=LessonFactory(course=self.course), creator=user_a)
+        params = {'fields': 'id,notes', 'fields[notes]': 'id,note'}
+
+        self.client.force_authenticate(user_a)
+        response_a = self.client.get(self.url, params)
+        self.client.force_authenticate(user_b)
+        response_b = self.client.get(self.url, params)
+
+        assert [item['id'] for item in response_a.data['notes']] == [note.id]
+        assert response_b.data['notes'] == []
+
+    def test_list_is_purged_by_new_courses(self):
+        self.client.get(COURSE_LIST_URL)
+        course = CourseFactory()
+
+        response = self.client.get(COURSE_LIST_URL)
+
+        assert course.id in [item['id'] for item in response.data['results']]
+
+    def test_list_is_purged_by_children_of_its_courses(self):
+        self.client.get(COURSE_LIST_URL, {'fields': 'id,num_lessons'})
+        LessonFactory(course=self.course)
+
+        response = self.client.get(COURSE_LIST_URL, {'fields': 'id,num_lessons'})
+
+        assert response.data['results'][0]['num_lessons'] == 1
+
+    @patch.object(CourseViewSet, 'response_cache_timeout', -1)
+    def test_stale_response_while_revalidating(self):
+        self.client.get(self.url)
+        Course.objects.filter(id=self.course.id).update(title='changed')
+
+        with patch('udemy.apps.core.mixins.view.cache.add', return_value=False):
+            response = self.client.get(self.url)
+        assert response.data['title'] == self.course.title
+
+        response = self.client.get(self.url)
+        assert response.data['title'] == 'changed'
@@ -0,0 +1,132 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from tests.factories.content import ContentFactory
+from tests.factories.course import CourseFactory
+from tests.factories.lesson import LessonFactory
+from tests.factories.rating import RatingFactory
+from tests.factories.user import UserFactory
+
+from udemy.apps.course.models import Course, CourseRelation, CourseStats
+
+
+class TestCourseStats(TestCase):
+    def setUp(self):
+        self.course = CourseFactory()
+
+    def get_stats(self):
+        return CourseStats.objects.get(course=self.course)
+
+    def test_stats_are_created_with_course(self):
+        assert CourseStats.objects.filter(course=self.course).exists()
+
+    def test_subscribers_are_counted(self):
+        relation = CourseRelation.objects.create(course=self.course, creator=UserFactory())
+        self.course.students.add(UserFactory())
+
+        assert self.get_stats().num_subscribers == 2
+
+        relation.delete()
+
+        assert self.get_stats().num_subscribers == 1
+
+    def test_students_add_and_remove_are_counted_once(self):
+        users = UserFactory.create_batch(2)
+        self.course.students.add(*users)
+
+        assert self.get_stats().num_subscribers == 2
+
+        self.course.students.remove(users[0])
+
+        assert self.get_stats().num_subscribers == 1
+
+        users[1].enrolled_courses.remove(self.course)
+
+        assert self.get_stats().num_subscribers == 0
+
+    def test_students_clear_is_counted_once(self):
+        self.course.students.add(*UserFactory.create_batch(2))
+
+        self.course.students.clear()
+
+        assert self.get_stats().num_subscribers == 0
+
+    def test_ratings_are_counted(self):
+        rating = RatingFactory(course=self.course, rating=4)
+        RatingFactory(course=self.course, rating=2)
+
+        stats = self.get_stats()
+        assert stats.num_ratings == 2
+        assert stats.rating_sum == 6
+
+        rating.rating = 5
+        rating.save()
+
+        assert self.get_stats().rating_sum == 7
+
+        rating.delete()
+
+        stats = self.get_stats()
+        assert stats.num_ratings == 1
+        assert stats.rating_sum == 2
+
+    def test_lessons_are_counted(self):
+        lesson = LessonFactory(course=self.course, video_duration=10)
+        LessonFactory(course=self.course, video_duration=20)
+
+        stats = self.get_stats()
+        assert stats.num_lessons == 2
+        assert stats.video_duration == 30
+
+        lesson.delete()
+
+        stats = self.get_stats()
+        assert stats.num_lessons == 1
+        assert stats.video_duration == 20
+
+    def test_moves_to_another_course_are_counted(self):
+        other_course = CourseFactory()
+        lesson = LessonFactory(course=self.course, video_duration=10)
+        content = ContentFactory(course=self.course, lesson=lesson)
+        rating = RatingFactory(course=self.course, rating=4)
+        lesson.order = None
+
+        for obj in (lesson, content, rating):
+            obj.course = other_course
+            obj.save()
+
+        stats = self.get_stats()
+        other_stats = CourseStats.objects.get(course=other_course)
+        assert (stats.num_lessons, stats.video_duration, stats.num_contents) == (0, 0, 0)
+        assert (stats.num_ratings, stats.rating_sum) == (0, 0)
+        assert (other_stats.num_lessons, other_stats.video_duration, other_stats.num_contents) == (1, 10, 1)
+        assert (other_stats.num_ratings, other_stats.rating_sum) == (1, 4)
+
+    def test_annotations_read_from_stats(self):
+        LessonFactory(course=self.course, video_duration=10)
+        RatingFactory(course=self.course, rating=4)
+        RatingFactory(course=self.course, rating=2)
+
+        course = Course.objects.annotate(
+            **Course.annotation_class.get_annotations('num_lessons', 'num_ratings', 'rating_avg')
+        ).get(id=self.course.id)
+
+        assert course.num_lessons == 1
+        assert course.num_ratings == 2
+        assert course.rating_avg == 3
+
+    def test_reconcile_command_fixes_drift(self):
+        LessonFactory(course=self.course, video_duration=10)
+        CourseStats.objects.filter(course=self.course).update(num_lessons=10, video_duration=0)
+        CourseStats.objects.filter(course=CourseFactory()).delete()
+
+        out = StringIO()
+        call_command('reconcile_course_stats', batch_size=1, stdout=out)
+
+        stats = self.get_stats()
+        assert stats.num_lessons == 1
+        assert stats.video_duration == 10
+        assert CourseStats.objects.count() == 2
+        assert '2 course stats reconciled.' in out.getvalue()
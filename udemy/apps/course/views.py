@@ -8,6 +8,9 @@ from udemy.apps.course.serializer import CourseSerializer
 
 
 class CourseViewSet(
+    view.ConditionalViewMixin,
+    view.ResponseCacheViewMixin,
+    view.AsyncReadViewMixin,
     view.AnnotationViewMixin,
     view.AnnotatePermissionMixin,
     view.ActionPermissionMixin,
@@ -17,6 +20,7 @@ class CourseViewSet(
 ):
     queryset = Course.objects.all()
     serializer_class = CourseSerializer
+    response_cache_user_related_objects = ('notes', 'lesson_relations')
     permission_classes_by_action = {
         ('default',): [IsAuthenticated, IsInstructor],
         ('create',): [IsAuthenticated],
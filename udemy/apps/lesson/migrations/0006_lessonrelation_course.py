@@ -0,0 +1,41 @@
+# Generated by Django 4.1.2 on 2026-10-17 12:00
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+# `LessonRelation.course` was declared on the model without a migration. The conditional retrieves look up the
+# children of the course, lesson relations included, and course deletes cascade to them, so both need the column.
+def set_lesson_relation_course(apps, schema_editor):
+    LessonRelation = apps.get_model('lesson', 'LessonRelation')
+    Lesson = apps.get_model('lesson', 'Lesson')
+
+    LessonRelation.objects.update(course_id=models.Subquery(
+        Lesson.objects.filter(pk=models.OuterRef('lesson_id')).values('course_id')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lesson', '0005_lessonrelation_unique lesson relation'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lessonrelation',
+            name='course',
+            field=models.ForeignKey(
+                null=True, on_delete=django.db.models.deletion.CASCADE, related_name='lesson_relations',
+                to='course.course'
+            ),
+        ),
+        migrations.RunPython(set_lesson_relation_course, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='lessonrelation',
+            name='course',
+            field=models.ForeignKey(
+                on_delete=django.db.models.deletion.CASCADE, related_name='lesson_relations', to='course.course'
+            ),
+        ),
+    ]
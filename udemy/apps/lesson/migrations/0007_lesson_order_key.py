@@ -0,0 +1,53 @@
+# Generated by Django 4.1.2 on 2026-10-17 12:00
+
+from django.db import migrations, models
+
+ORDER_KEY_GAP = 2 ** 16
+
+
+def set_order_keys(apps, schema_editor):
+    Lesson = apps.get_model('lesson', 'Lesson')
+
+    lessons = list(Lesson.objects.order_by('course_id', 'order', 'id').only('id', 'course_id'))
+    position, course_id = 0, None
+    for lesson in lessons:
+        position = position + 1 if lesson.course_id == course_id else 1
+        course_id = lesson.course_id
+        lesson.order_key = position * ORDER_KEY_GAP
+    Lesson.objects.bulk_update(lessons, ['order_key'], batch_size=500)
+
+
+def set_orders(apps, schema_editor):
+    Lesson = apps.get_model('lesson', 'Lesson')
+
+    lessons = list(Lesson.objects.order_by('course_id', 'order_key', 'id').only('id', 'course_id'))
+    position, course_id = 0, None
+    for lesson in lessons:
+        position = position + 1 if lesson.course_id == course_id else 1
+        course_id = lesson.course_id
+        lesson.order = position
+    Lesson.objects.bulk_update(lessons, ['order'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('lesson', '0006_lessonrelation_course'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lesson',
+            name='order_key',
+            field=models.BigIntegerField(db_index=True, null=True),
+        ),
+        migrations.RunPython(set_order_keys, set_orders),
+        migrations.AlterModelOptions(
+            name='lesson',
+            options={'ordering': ('order_key',)},
+        ),
+        migrations.RemoveField(
+            model_name='lesson',
+            name='order',
+        ),
+    ]
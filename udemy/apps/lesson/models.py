@@ -1,12 +1,77 @@
-from django.db import models
+from collections import defaultdict
 
-from udemy.apps.core.models import OrderedModel, CreatorBase, TimeStampedBase
+from django.core.exceptions import ValidationError
+from django.db import models, transaction
+
+from udemy.apps.core.models import SparseOrderedManager, SparseOrderedModel, CreatorBase, TimeStampedBase
+from udemy.apps.core.signals import post_bulk_create
 from udemy.apps.course.models import Course
 from udemy.apps.module.models import Module
 from udemy.apps.user.models import User
 
 
-class Lesson(OrderedModel):
+class LessonManager(SparseOrderedManager):
+
+    def bulk_create_ordered(self, lessons, batch_size=500):
+        """
+        Insert the lessons, of one or more modules, after the last lesson of their module like `save` does.
+
+        The final order of each course is computed in memory, in a single transaction the lessons of the courses are
+        locked, the keys of the existing ones are renumbered in one UPDATE and the new ones are inserted with
+        `bulk_create`, see `OrderedManager.bulk_create_ordered`.
+        """
+        lessons = list(lessons)
+        if not lessons:
+            return lessons
+
+        new_lessons = defaultdict(list)
+        for lesson in lessons:
+            new_lessons[lesson.course_id].append(lesson)
+
+        with transaction.atomic(using=self.db):
+            existing_lessons = defaultdict(list)
+            queryset = self.model._base_manager.filter(course_id__in=new_lessons.keys()).select_for_update()
+            for lesson in queryset.order_by('order_key', 'pk').only('course_id', 'module_id', 'order_key'):
+                existing_lessons[lesson.course_id].append(lesson)
+
+            order_keys = dict()
+            for course_id, course_lessons in new_lessons.items():
+                ordered_lessons = self.get_course_order(existing_lessons[course_id], course_lessons)
+                for position, lesson in enumerate(ordered_lessons, start=1):
+                    order_key = self.model.get_reorder_value(position)
+                    if lesson.pk is None:
+                        lesson.order_key, lesson.order = order_key, position
+                    elif lesson.order_key != order_key:
+                        order_keys[lesson.pk] = order_key
+
+            if order_keys:
+                self.model.update_order_values(order_keys)
+            self.model.do_after_bulk_create(lessons)
+            self.bulk_create(lessons, batch_size=batch_size)
+
+        post_bulk_create.send(sender=self.model, objs=lessons)
+        return lessons
+
+    @staticmethod
+    def get_course_order(existing_lessons, new_lessons):
+        """Return the lessons of a course in order, the new ones after the last lesson of their module."""
+        last_positions = {lesson.module_id: position for position, lesson in enumerate(existing_lessons)}
+        module_lessons, new_module_lessons = defaultdict(list), []
+        for lesson in new_lessons:
+            if lesson.module_id in last_positions:
+                module_lessons[lesson.module_id].append(lesson)
+            else:
+                new_module_lessons.append(lesson)
+
+        ordered_lessons = []
+        for position, lesson in enumerate(existing_lessons):
+            ordered_lessons.append(lesson)
+            if last_positions[lesson.module_id] == position:
+                ordered_lessons.extend(module_lessons[lesson.module_id])
+        return [*ordered_lessons, *new_module_lessons]
+
+
+class Lesson(SparseOrderedModel):
     title = models.CharField(max_length=100)
     video = models.URLField()
     video_id = models.CharField(max_length=100, null=True)
@@ -21,21 +86,46 @@ class Lesson(OrderedModel):
         related_name='lessons',
         on_delete=models.CASCADE,
     )
-    order_in_respect = ('course', 'module')
+    order_in_respect = ('course',)
+
+    objects = LessonManager()
 
-    def get_next_order(self):
+    class Meta(SparseOrderedModel.Meta):
+        indexes = [models.Index(fields=['course', 'order_key'])]
+
+    def get_insert_order_key(self):
+        """The lessons of a module are together in the course, a new lesson goes after the last one of its module."""
+        module_key = self.get_queryset().filter(module_id=self.module_id).aggregate(key=models.Max('order_key'))['key']
+        if module_key is None:
+            return super().get_insert_order_key()
+
+        next_key = self.get_queryset().filter(order_key__gt=module_key).aggregate(key=models.Min('order_key'))['key']
+        return self.get_order_key_between(module_key, next_key)
+
+    def get_move_order_key(self, order):
+        """A lesson moves only among the lessons of its module, so the lessons of a module stay together."""
         queryset = self.get_queryset()
-        if queryset.exists():
-            last_order = queryset.aggregate(ls=models.Max('order'))['ls']
-            order = last_order + 1
-        else:
-            last_order = self.course.lessons.aggregate(ls=models.Max('order'))['ls']
-            order = last_order + 1 if last_order else 1
-        return order
-
-    def do_after_create(self):
-        self.course.lessons.filter(order__gte=self.order).update(
-            order=models.ExpressionWrapper(models.F('order') + 1, output_field=models.PositiveIntegerField()))
+        keys = queryset.filter(module_id=self.module_id).aggregate(
+            first=models.Min('order_key'), last=models.Max('order_key')
+        )
+        first_order = queryset.filter(order_key__lt=keys['first']).count() + 1
+        last_order = queryset.filter(order_key__lte=keys['last']).count()
+        if not first_order <= order <= last_order:
+            raise ValidationError({'order': 'The order must be one of the orders of the lessons of the module.'})
+        return super().get_move_order_key(order)
+
+    @classmethod
+    def validate_reorder(cls, pks):
+        """The lessons of each module must stay together in the course."""
+        modules = dict(cls._base_manager.filter(pk__in=pks).values_list('pk', 'module_id'))
+        seen_modules, previous_module = set(), None
+        for pk in pks:
+            module_id = modules[pk]
+            if module_id != previous_module:
+                if module_id in seen_modules:
+                    raise ValidationError({'order': 'The lessons of a module must be together in the order.'})
+                seen_modules.add(module_id)
+                previous_module = module_id
 
     def __str__(self):
         return self.title
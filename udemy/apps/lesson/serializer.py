@@ -1,3 +1,5 @@
+from rest_framework import serializers
+
 from udemy.apps.core.serializer import ModelSerializer
 from udemy.apps.core.permissions import IsInstructor
 from udemy.apps.course.serializer import CourseSerializer
@@ -6,6 +8,8 @@ from udemy.apps.module.serializer import ModuleSerializer
 
 
 class LessonSerializer(ModelSerializer):
+    order = serializers.IntegerField(min_value=1, required=False)
+
     class Meta:
         model = Lesson
         fields = [
@@ -50,7 +54,7 @@ class LessonSerializer(ModelSerializer):
     def get_related_objects(self):
         related_objects = super().get_related_objects()
         user = getattr(self.context.get('request'), 'user', None)
-        if user:
+        if user and user.is_authenticated:
             related_objects['notes']['filter'] = {
                 'creator': user
             }
@@ -1,6 +1,8 @@
 from random import randint
 
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
 from parameterized import parameterized
 
@@ -18,6 +20,8 @@ from udemy.apps.lesson.models import Lesson
 from udemy.apps.lesson.serializer import LessonSerializer
 
 LESSON_LIST_URL = reverse('lesson-list')
+LESSON_REORDER_URL = reverse('lesson-reorder')
+LESSON_BULK_URL = reverse('lesson-bulk-create')
 
 
 def lesson_detail_url(pk): return reverse('lesson-detail', kwargs={'pk': pk})
@@ -144,6 +148,29 @@ class TestLessonOrder(TestCase):
         for index, model in enumerate(Lesson.objects.all(), start=1):
             self.assertEqual(model.order, index)
 
+    def test_lesson_can_not_be_moved_out_of_its_module(self):
+        course = CourseFactory()
+        modules = ModuleFactory.create_batch(2, course=course)
+        course.instructors.add(self.user)
+        lessons = [*LessonFactory.create_batch(2, course=course, module=modules[0]),
+                   LessonFactory(course=course, module=modules[1])]
+
+        response = self.client.patch(lesson_detail_url(pk=lessons[0].id), {'order': 3})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(Lesson.objects.values_list('id', flat=True)), [lesson.id for lesson in lessons])
+
+        response = self.client.patch(lesson_detail_url(pk=lessons[2].id), {'order': 2})
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.patch(lesson_detail_url(pk=lessons[0].id), {'order': 2})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            list(Lesson.objects.values_list('id', flat=True)), [lessons[1].id, lessons[0].id, lessons[2].id]
+        )
+
     def test_order_lesson_is_generated_correctly(self):
         course = CourseFactory()
         modules = ModuleFactory.create_batch(5, course=course)
@@ -154,3 +181,108 @@ class TestLessonOrder(TestCase):
         for index, model in enumerate(Lesson.objects.all(), start=1):
             self.assertEqual(model.order, index)
 
+    def test_lessons_bulk_reorder(self):
+        course = CourseFactory()
+        module = ModuleFactory(course=course)
+        course.instructors.add(self.user)
+        lessons = LessonFactory.create_batch(5, course=course, module=module)
+        pks = [lessons[index].id for index in (4, 2, 0, 1, 3)]
+
+        response = self.client.post(LESSON_REORDER_URL, {'order': pks}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(list(Lesson.objects.values_list('id', flat=True)), pks)
+        for index, model in enumerate(Lesson.objects.all(), start=1):
+            self.assertEqual(model.order, index)
+
+    def test_lessons_bulk_reorder_needs_all_lessons_of_the_course(self):
+        course = CourseFactory()
+        course.instructors.add(self.user)
+        lessons = LessonFactory.create_batch(3, course=course)
+
+        response = self.client.post(LESSON_REORDER_URL, {'order': [lessons[1].id, lessons[0].id]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_lessons_bulk_reorder_keeps_modules_together(self):
+        course = CourseFactory()
+        modules = ModuleFactory.create_batch(2, course=course)
+        course.instructors.add(self.user)
+        lessons = [*LessonFactory.create_batch(2, course=course, module=modules[0]),
+                   *LessonFactory.create_batch(2, course=course, module=modules[1])]
+
+        pks = [lessons[index].id for index in (0, 2, 1, 3)]
+        response = self.client.post(LESSON_REORDER_URL, {'order': pks}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(list(Lesson.objects.values_list('id', flat=True)), [lesson.id for lesson in lessons])
+
+        pks = [lessons[index].id for index in (3, 2, 1, 0)]
+        response = self.client.post(LESSON_REORDER_URL, {'order': pks}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(list(Lesson.objects.values_list('id', flat=True)), pks)
+
+    def test_only_instructors_can_bulk_reorder_lessons(self):
+        lessons = LessonFactory.create_batch(2)
+
+        response = self.client.post(LESSON_REORDER_URL, {'order': [lessons[1].id, lessons[0].id]}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_lessons_bulk_create(self):
+        course = CourseFactory()
+        modules = ModuleFactory.create_batch(3, course=course)
+        course.instructors.add(self.user)
+        first_lessons = [LessonFactory(course=course, module=module) for module in modules[:2]]
+
+        payload = [
+            {'title': title, 'video': 'https://www.youtube.com/watch?v=Ejkb_YpuHWs', 'module': module.id,
+             'course': course.id}
+            for title, module in (('a', modules[2]), ('b', modules[0]), ('c', modules[1]), ('d', modules[0]))
+        ]
+        response = self.client.post(LESSON_BULK_URL, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(response.data), 4)
+        self.assertEqual(
+            [lesson.title for lesson in Lesson.objects.all()],
+            [first_lessons[0].title, 'b', 'd', first_lessons[1].title, 'c', 'a']
+        )
+        for index, model in enumerate(Lesson.objects.all(), start=1):
+            self.assertEqual(model.order, index)
+        course.stats.refresh_from_db()
+        self.assertEqual(course.stats.num_lessons, 6)
+
+    def test_only_instructors_can_bulk_create_lessons(self):
+        module = ModuleFactory()
+
+        payload = [{
+            'title': 'title', 'video': 'https://www.youtube.com/watch?v=Ejkb_YpuHWs', 'module': module.id,
+            'course': module.course.id
+        }]
+        response = self.client.post(LESSON_BULK_URL, payload, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertFalse(Lesson.objects.exists())
+
+    def test_bulk_create_ordered_renumbers_the_course_in_one_update(self):
+        course = CourseFactory()
+        modules = ModuleFactory.create_batch(2, course=course)
+        LessonFactory.create_batch(5, course=course, module=modules[0])
+        LessonFactory.create_batch(5, course=course, module=modules[1])
+
+        lessons = [
+            Lesson(title=str(index), video='https://www.youtube.com/watch?v=Ejkb_YpuHWs', course=course,
+                   module=modules[0])
+            for index in range(300)
+        ]
+        with CaptureQueriesContext(connection) as context:
+            Lesson.objects.bulk_create_ordered(lessons)
+
+        updates = [query['sql'] for query in context.captured_queries if query['sql'].startswith('UPDATE "lesson')]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual([lesson.order for lesson in lessons], list(range(6, 306)))
+        self.assertEqual(
+            list(Lesson.objects.values_list('module_id', flat=True)), [modules[0].id] * 305 + [modules[1].id] * 5
+        )
@@ -1,4 +1,7 @@
+from rest_framework import status
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet
 
 from udemy.apps.core.mixins import view
@@ -8,6 +11,9 @@ from udemy.apps.lesson.serializer import LessonSerializer
 
 
 class LessonViewSet(
+    view.ConditionalViewMixin,
+    view.ResponseCacheViewMixin,
+    view.ReorderViewMixin,
     view.ActionPermissionMixin,
     view.RelatedObjectViewMixin,
     view.AnnotatePermissionMixin,
@@ -16,7 +22,18 @@ class LessonViewSet(
 ):
     queryset = Lesson.objects.all()
     serializer_class = LessonSerializer
+    ordering = 'order_key'
+    response_cache_user_related_objects = ('notes',)
     permission_classes_by_action = {
         ('default',): [IsAuthenticated, IsInstructor],
         ('retrieve', 'list'): [IsAuthenticated, IsEnrolled]
     }
+
+    @action(detail=False, methods=['post'], url_path='bulk')
+    def bulk_create(self, request, *args, **kwargs):
+        """Create a list of lessons, of one or more modules, with one renumbering of their courses."""
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+
+        lessons = Lesson.objects.bulk_create_ordered([Lesson(**data) for data in serializer.validated_data])
+        return Response(self.get_serializer(lessons, many=True).data, status=status.HTTP_201_CREATED)
@@ -8,7 +8,10 @@ from udemy.apps.module.serializer import ModuleSerializer
 
 
 class ModuleViewSet(
+    view.ConditionalViewMixin,
+    view.ResponseCacheViewMixin,
     view.AnnotationViewMixin,
+    view.ReorderViewMixin,
     view.ActionPermissionMixin,
     view.RelatedObjectViewMixin,
     view.AnnotatePermissionMixin,
@@ -17,6 +20,8 @@ class ModuleViewSet(
 ):
     queryset = Module.objects.all()
     serializer_class = ModuleSerializer
+    ordering = 'order'
+    response_cache_user_related_objects = ('notes', 'lesson_relations')
     permission_classes_by_action = {
         ('default',): [IsAuthenticated, IsInstructor],
         ('retrieve', 'list'): [IsAuthenticated, IsEnrolled]
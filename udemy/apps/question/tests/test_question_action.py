@@ -57,7 +57,7 @@ class TestQuestionAction(TestCase):
         actions = ActionSerializer(actions, many=True)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, actions.data)
+        self.assertEqual(response.data['results'], actions.data)
         self.assertEqual(question.actions.count(), 10)
 
     def test_question_action_retrieve(self):
@@ -20,12 +20,14 @@ class QuizViewSet(
 ):
     queryset = Quiz.objects.all()
     serializer_class = QuizSerializer
+    ordering = 'order'
     permission_classes_by_action = {
         ('default',): [IsAuthenticated, IsInstructor],
         ('retrieve', 'list'): [IsAuthenticated, IsEnrolled],
     }
 
 class QuestionViewSet(
+    view.ReorderViewMixin,
     view.ActionPermissionMixin,
     view.RelatedObjectViewMixin,
     view.AnnotatePermissionMixin,
@@ -33,6 +35,7 @@ class QuestionViewSet(
 ):
     queryset = Question.objects.all()
     serializer_class = QuestionSerializer
+    ordering = 'order'
     permission_classes_by_action = {
         ('default',): [IsAuthenticated, IsInstructor],
         ('retrieve', 'list'): [IsAuthenticated, IsEnrolled],
@@ -57,7 +57,7 @@ class TestRatingAction(TestCase):
         actions = ActionSerializer(actions, many=True)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, actions.data)
+        self.assertEqual(response.data['results'], actions.data)
         self.assertEqual(rating.actions.count(), 10)
 
     def test_rating_action_retrieve(self):
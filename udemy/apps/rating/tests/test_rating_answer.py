@@ -47,4 +47,4 @@ class TestRatingAnswer(TestCase):
         serializer = AnswerSerializer(answers, many=True)
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertEqual(response.data, serializer.data)
+        self.assertEqual(response.data['results'], serializer.data)
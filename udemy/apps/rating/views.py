@@ -16,6 +16,7 @@ class RatingViewSet(
 ):
     queryset = Rating.objects.all()
     serializer_class = RatingSerializer
+    ordering = 'created'
     permission_classes_by_action = {
         ('default',): [IsAuthenticated, IsCreatorObject, IsEnrolled],
         ('retrieve', 'list'): [AllowAny],
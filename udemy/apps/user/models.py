@@ -44,6 +44,7 @@ class User(AbstractUser):
     job_title = models.CharField(max_length=255)
     locale = models.CharField(max_length=255)
     bio = models.TextField()
+    membership_version = models.PositiveIntegerField(default=0, editable=False)
     annotation_class = UserAnnotations()
 
     USERNAME_FIELD = 'email'
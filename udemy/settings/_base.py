@@ -76,7 +76,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
-    'udemy.apps.core.middleware.ThreadLocalMiddleware',
+    'udemy.apps.core.middleware.request_context_middleware',
 ]
 
 ROOT_URLCONF = 'udemy.urls'
@@ -172,7 +172,9 @@ REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
-    'EXCEPTION_HANDLER': 'udemy.apps.core.exceptions.django_error_handler'
+    'EXCEPTION_HANDLER': 'udemy.apps.core.exceptions.django_error_handler',
+    'DEFAULT_PAGINATION_CLASS': 'udemy.apps.core.paginator.KeysetPagination',
+    'PAGE_SIZE': 100,
 }
 
 SIMPLE_JWT = {
@@ -205,4 +207,33 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_EXP_CLAIM': 'refresh_exp',
     'SLIDING_TOKEN_LIFETIME': timedelta(minutes=5),
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),
+
+    'TOKEN_OBTAIN_SERIALIZER': 'udemy.apps.core.tokens.CourseMembershipTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'udemy.apps.core.tokens.CourseMembershipTokenRefreshSerializer',
 }
+
+# Access tokens carry the ids of the courses where the user is enrolled or instructor, so the permissions are checked
+# without queries. Users with more courses than the limit are checked in the database.
+COURSE_MEMBERSHIP_CLAIMS = os.environ.get('COURSE_MEMBERSHIP_CLAIMS', 'False') == 'True'
+COURSE_MEMBERSHIP_CLAIMS_MAX_COURSES = 500
+
+# Async views run the independent queries of a request, e.g. the permission check, the main query and each prefetch,
+# concurrently in worker threads with their own database connections. The queries of a request then don't share a
+# connection nor a snapshot, and the connections grow with the concurrency, so it is meant for ASGI deployments.
+ASYNC_VIEW_CONCURRENT_QUERIES = os.environ.get('ASYNC_VIEW_CONCURRENT_QUERIES', 'False') == 'True'
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
+}
+
+# Items of new contents, e.g. text bodies and links, are stored in the content row instead of in their own tables, the
+# existing items are moved with the `inline_content_items` command.
+CONTENT_INLINE_ITEMS = os.environ.get('CONTENT_INLINE_ITEMS', 'False') == 'True'
+
+# Seconds the responses of the course viewsets are cached, and more seconds an expired response is served while it is
+# revalidated.
+RESPONSE_CACHE_TIMEOUT = 60
+RESPONSE_CACHE_STALE_TIMEOUT = 300
@@ -13,3 +13,6 @@ PASSWORD_HASHERS = [
 INSTALLED_APPS.extend([
     'udemy.apps.core',
 ])
+
+# The data of a TestCase is only visible to the database connection of the test thread.
+ASYNC_VIEW_CONCURRENT_QUERIES = False